@@ -14,27 +14,48 @@ on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
 express or implied. See the License for the specific language governing
 permissions and limitations under the License.
 """
-import logging
-
-from .connection import connect, connect_url
-from . import models, _constants, _utilities, _time_utilities
-from . import services
+import sys
 
 __all__ = ['services', 'models']
 
 __version__ = '3.0.5'
 
-try:
-    logging.debug("Checking 'python-requests' version...")
-    import requests
-
-    req_v = requests.__version__
-    if list(map(lambda x: int(x), req_v.split("."))) >= [2, 4, 2]:
-        logging.debug("Module 'python-requests' version is %s. The version is compatible.", req_v)
+#: public names of the package and modules which define them, imported on first access
+_lazy_attributes = {
+    'connect': 'connection',
+    'connect_url': 'connection',
+    'AsyncClient': '_async_client',
+    'BufferedWriter': 'writer',
+    'SeriesCache': 'cache',
+    'MetadataCache': 'cache',
+    'MetricsCollector': 'metrics',
+    'RetryPolicy': 'retry',
+}
+
+#: modules available as package attributes, imported on first access
+_lazy_modules = ('models', 'services', 'async_services', 'balancer', 'connection', 'exceptions', 'cache', 'metrics',
+                 'retry', 'writer', 'utils', '_constants', '_utilities', '_time_utilities')
+
+
+def __getattr__(name):
+    import importlib
+    if name in _lazy_attributes:
+        value = getattr(importlib.import_module('.' + _lazy_attributes[name], __name__), name)
+    elif name in _lazy_modules:
+        value = importlib.import_module('.' + name, __name__)
     else:
-        raise Exception
-except:
-    import sys
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attributes) | set(_lazy_modules))
+
 
-    sys.stderr.write("ERROR. Module 'python-requests' version is {} not compatible. Required version is 2.4.2.\n".format(req_v))
-    sys.stderr.flush()
+if sys.version_info < (3, 7):
+    # module __getattr__ is not supported, import everything eagerly
+    for _name in _lazy_attributes:
+        __getattr__(_name)
+    for _name in _lazy_modules:
+        __getattr__(_name)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+import asyncio
+import logging
+import sys
+from urllib.parse import urljoin
+
+from . import _jsonutil
+from ._jsoncodec import get_codec
+from ._utilities import portal_file_name
+from .exceptions import ServerException
+
+
+class AsyncClient(object):
+    """
+    asyncio request wrapper based on httpx
+    sets method, path, payload
+    returns response data
+        or True if request is successful without content
+    """
+
+    def __init__(self, base_url,
+                 username=None, password=None,
+                 ssl_verify=False, timeout=None,
+                 max_concurrency=100, pool_maxsize=None, transport=None, json_codec=None):
+        """
+        :param base_url: ATSD url
+        :param username: login
+        :param password:
+        :param ssl_verify: verify ssl certificate
+        :param timeout: request timeout
+        :param max_concurrency: maximum number of requests in flight at the same time (default 100)
+        :param pool_maxsize: maximum number of open connections (default max_concurrency)
+        :param transport: httpx transport, for example httpx.MockTransport to serve requests locally
+        :param json_codec: JSON codec for request and response bodies: 'json', 'orjson', 'ujson', 'rapidjson'
+        or 'auto' to use the fastest installed one (default 'json')
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("AsyncClient requires 'httpx' module. Install it with: pip install atsd_client[async]")
+        logging.debug('Connecting to ATSD at %s as %s user.' % (base_url, username))
+        self.context = urljoin(base_url, 'api/')
+        self.max_concurrency = int(max_concurrency)
+        pool_maxsize = int(pool_maxsize) if pool_maxsize is not None else self.max_concurrency
+        self.session = httpx.AsyncClient(
+            auth=(username, password) if username is not None and password is not None else None,
+            verify=not (ssl_verify is False or ssl_verify == 'False'),
+            timeout=float(timeout) if timeout is not None else None,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            transport=transport)
+        self.json_codec = get_codec(json_codec)
+        self.client_version = sys.modules[_jsonutil.__package__].__version__
+        self.python_version = sys.version_info[:3]
+        # created on first request to bind to the running event loop
+        self._semaphore = None
+
+    async def _request(self, method, path, params=None, json=None, data=None, portal=False, portal_file=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {
+            'user-agent': 'atsd-api-python/{} python/{}.{}.{}'.format(self.client_version, *self.python_version)}
+        body = _jsonutil.serialize(json)
+        if body is not None:
+            data = self.json_codec.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        async with self._semaphore:
+            response = await self.session.request(
+                method,
+                urljoin(self.context, path),
+                params=params,
+                content=data,
+                headers=headers
+            )
+        if not (200 <= response.status_code < 300):
+            raise ServerException(response.status_code, response.text)
+        if portal:
+            if not portal_file:
+                portal_file = portal_file_name(response.headers.get("Content-Disposition"), params.get("entity"))
+            with open(portal_file, 'wb') as f:
+                f.write(response.content)
+            return portal_file
+        try:
+            return self.json_codec.loads(response.content)
+        except ValueError:
+            return response.text
+
+    async def post(self, path, data, params=None):
+        return await self._request('POST', path, params=params, json=data)
+
+    async def post_plain_text(self, path, data, params=None):
+        return await self._request('POST', path, params=params, data=data)
+
+    async def patch(self, path, data):
+        return await self._request('PATCH', path, json=data)
+
+    async def get(self, path, params=None, portal=False, portal_file=None):
+        return await self._request('GET', path, params=params, portal=portal, portal_file=portal_file)
+
+    async def put(self, path, data):
+        return await self._request('PUT', path, json=data)
+
+    async def delete(self, path):
+        return await self._request('DELETE', path)
+
+    async def close(self):
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
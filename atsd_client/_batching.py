@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from requests.exceptions import RequestException
+
+from . import _jsonutil
+from .exceptions import ServerException
+
+
+class BatchFailure(object):
+    """
+    Batch which could not be sent
+    """
+
+    def __init__(self, index, batch, sample_count, exception):
+        #: `int` sequence number of the batch starting from 0
+        self.index = index
+        #: `list` of serialized objects in the batch
+        self.batch = batch
+        #: `int` number of series objects in the batch
+        self.series_count = len(batch)
+        #: `int` number of samples in the batch
+        self.sample_count = sample_count
+        #: :class:`Exception` raised while sending the batch
+        self.exception = exception
+
+    def __repr__(self):
+        return "<BatchFailure index={}, series={}, samples={}, error={!r}>".format(
+            self.index, self.series_count, self.sample_count, self.exception)
+
+
+class BatchInsertResult(object):
+    """
+    Aggregated result of an insert split into multiple requests.
+    Evaluates to True if all batches are inserted.
+    """
+
+    def __init__(self):
+        #: `int` number of requests sent
+        self.batches = 0
+        #: `int` number of samples sent
+        self.samples = 0
+        #: `list` of :class:`BatchFailure` for failed requests
+        self.failures = []
+
+    @property
+    def succeeded(self):
+        return len(self.failures) == 0
+
+    @property
+    def failed_samples(self):
+        return sum(failure.sample_count for failure in self.failures)
+
+    def __bool__(self):
+        return self.succeeded
+
+    def __repr__(self):
+        return "<BatchInsertResult batches={}, samples={}, failures={}>".format(self.batches, self.samples,
+                                                                                len(self.failures))
+
+
+def split_series(series_objects, batch_size=None, batch_bytes=None):
+    """
+    Split series into batches with at most batch_size samples and approximately batch_bytes of JSON each.
+    Series with more samples than fit into one batch are split into several series with the same key.
+
+    :param series_objects: :class:`.Series` objects
+    :param batch_size: `int` maximum number of samples per batch
+    :param batch_bytes: `int` maximum size of serialized batch in bytes
+    :return: generator of (`list` of serialized series, sample count) tuples
+    """
+    batch, samples, size = [], 0, 2
+    for series in series_objects:
+        header = _jsonutil.serialize(dict((key[1:] if key.startswith('_') else key, value)
+                                          for key, value in vars(series).items()
+                                          if key != '_data' and value is not None))
+        if batch_bytes is None:
+            # batches limited by count only, samples are split in slices without estimating their size
+            data = series.data
+            offset = 0
+            while offset < len(data):
+                if batch_size is not None and samples >= batch_size:
+                    yield batch, samples
+                    batch, samples = [], 0
+                chunk = data[offset:offset + batch_size - samples] if batch_size is not None else data[offset:]
+                batch.append(dict(header, data=[sample.to_dict() for sample in chunk]))
+                samples += len(chunk)
+                offset += len(chunk)
+            continue
+        header_size = len(json.dumps(dict(header, data=[]))) + 2
+        current = None
+        for sample in series.data:
+            sample_dict = sample.to_dict()
+            sample_size = len(json.dumps(sample_dict)) + 2
+            added_size = sample_size if current is not None else sample_size + header_size
+            if samples > 0 and ((batch_size is not None and samples + 1 > batch_size) or
+                                size + added_size > batch_bytes):
+                yield batch, samples
+                batch, samples, size = [], 0, 2
+                current = None
+                added_size = sample_size + header_size
+            if current is None:
+                current = dict(header, data=[])
+                batch.append(current)
+            current['data'].append(sample_dict)
+            samples += 1
+            size += added_size
+    if samples > 0:
+        yield batch, samples
+
+
+def csv_lines(csv_data):
+    """
+    Read CSV lines without line terminators from a file or an iterable, skipping empty lines.
+    Quoted values must not contain line breaks.
+
+    :param csv_data: `str` file path | file object | iterable of `str` lines or of sequences of values
+    :return: generator of `str`
+    """
+    if isinstance(csv_data, str):
+        with io.open(csv_data, encoding='utf-8', newline='') as f:
+            for line in csv_lines(f):
+                yield line
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='')
+    for row in csv_data:
+        if isinstance(row, bytes):
+            row = row.decode('utf-8')
+        if not isinstance(row, str):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            row = buffer.getvalue()
+        row = row.rstrip('\r\n')
+        if row:
+            yield row
+
+
+def split_csv(lines, chunk_size=None, chunk_bytes=None):
+    """
+    Split CSV lines into chunks with at most chunk_size rows and approximately chunk_bytes characters each.
+    The first line is a header and is repeated at the beginning of each chunk.
+
+    :param lines: iterable of `str` lines, the first line is the header
+    :param chunk_size: `int` maximum number of rows per chunk, excluding the header
+    :param chunk_bytes: `int` maximum size of chunk text
+    :return: generator of (`str` chunk text, `int` row count) tuples
+    """
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return
+    chunk, size = [header], len(header) + 1
+    for line in lines:
+        if len(chunk) > 1 and ((chunk_size is not None and len(chunk) > chunk_size) or
+                               (chunk_bytes is not None and size + len(line) + 1 > chunk_bytes)):
+            yield '\n'.join(chunk) + '\n', len(chunk) - 1
+            chunk, size = [header], len(header) + 1
+        chunk.append(line)
+        size += len(line) + 1
+    if len(chunk) > 1:
+        yield '\n'.join(chunk) + '\n', len(chunk) - 1
+
+
+def send_batches(send, batches, max_workers=1):
+    """
+    Send batches sequentially or with a thread pool keeping at most max_workers requests in flight.
+
+    :param send: function which sends a `list` of serialized objects
+    :param batches: iterable of (`list` of serialized objects, sample count) tuples
+    :param max_workers: `int` number of concurrent requests
+    :return: :class:`BatchInsertResult`
+    """
+    result = BatchInsertResult()
+
+    def handle(index, batch, sample_count, exception):
+        result.batches += 1
+        result.samples += sample_count
+        if exception is not None:
+            result.failures.append(BatchFailure(index, batch, sample_count, exception))
+
+    def call(batch):
+        try:
+            send(batch)
+        except (ServerException, RequestException) as e:
+            return e
+        return None
+
+    if max_workers is None or max_workers <= 1:
+        for index, (batch, sample_count) in enumerate(batches):
+            handle(index, batch, sample_count, call(batch))
+        result.failures.sort(key=lambda failure: failure.index)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for index, (batch, sample_count) in enumerate(batches):
+            if len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    handle(*(pending.pop(future) + (future.result(),)))
+            pending[executor.submit(call, batch)] = (index, batch, sample_count)
+        for future in list(pending):
+            handle(*(pending.pop(future) + (future.result(),)))
+    result.failures.sort(key=lambda failure: failure.index)
+    return result
@@ -14,16 +14,126 @@ on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
 express or implied. See the License for the specific language governing
 permissions and limitations under the License.
 """
-import logging, requests, sys
+import gzip, logging, requests, sys, threading, time, weakref, zlib
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE, DEFAULT_POOLBLOCK
 from requests.compat import urljoin
+from requests.exceptions import ConnectTimeout, ConnectionError as RequestsConnectionError
 from . import _jsonutil
+from ._jsoncodec import get_codec
+from .balancer import NodePool
+from .metrics import RequestEvent
+from .retry import RetryPolicy, is_idempotent
+from ._utilities import to_bool, portal_file_name
 from .exceptions import ServerException
-import datetime
 
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.packages.urllib3.exceptions import InsecureRequestWarning, NewConnectionError
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+# response statuses which indicate that the node cannot serve requests
+_node_failure_statuses = (502, 503, 504)
+
+
+def _not_sent(exception):
+    """
+    :param exception: exception raised by :meth:`requests.Session.send`
+    :return: True if the connection could not be established, so the request did not reach the server
+    """
+    if isinstance(exception, ConnectTimeout):
+        return True
+    if not isinstance(exception, RequestsConnectionError):
+        return False
+    reason = exception.args[0] if exception.args else None
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+
+
+def _check_requests_version():
+    logging.debug("Checking 'python-requests' version...")
+    req_v = requests.__version__
+    try:
+        compatible = list(map(lambda x: int(x), req_v.split("."))) >= [2, 4, 2]
+    except ValueError:
+        compatible = False
+    if compatible:
+        logging.debug("Module 'python-requests' version is %s. The version is compatible.", req_v)
+    else:
+        sys.stderr.write("ERROR. Module 'python-requests' version is {} not compatible. "
+                         "Required version is 2.4.2.\n".format(req_v))
+        sys.stderr.flush()
+
+
+_check_requests_version()
+
+
+def _keep_alive_pool(pool_class, keep_alive_timeout):
+    """
+    Create connection pool class which closes connections idle for longer than keep_alive_timeout seconds
+    instead of handing them out, so that connections dropped by the server are not reused.
+    """
+
+    class KeepAlivePool(pool_class):
+        expired_connections = 0
+
+        def _get_conn(self, timeout=None):
+            conn = super(KeepAlivePool, self)._get_conn(timeout=timeout)
+            idle_since = getattr(conn, '_atsd_idle_since', None)
+            if keep_alive_timeout is not None and idle_since is not None \
+                    and time.monotonic() - idle_since > keep_alive_timeout:
+                conn.close()
+                self.expired_connections += 1
+            return conn
+
+        def _put_conn(self, conn):
+            if conn is not None:
+                conn._atsd_idle_since = time.monotonic()
+            super(KeepAlivePool, self)._put_conn(conn)
+
+    return KeepAlivePool
+
+
+class PoolAdapter(HTTPAdapter):
+    """
+    HTTP adapter with keep-alive idle timeout and connection pool usage counters
+    """
+    __attrs__ = HTTPAdapter.__attrs__ + ['keep_alive_timeout']
+
+    def __init__(self, keep_alive_timeout=None, **kwargs):
+        self.keep_alive_timeout = keep_alive_timeout
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _keep_alive_pool(HTTPConnectionPool, self.keep_alive_timeout),
+            'https': _keep_alive_pool(HTTPSConnectionPool, self.keep_alive_timeout)
+        }
+
+    def pool_stats(self):
+        """
+        :return: `dict` with connection pool usage counters summed over all pools of the adapter
+        """
+        stats = {'pools': 0, 'connections_created': 0, 'connections_expired': 0,
+                 'connections_idle': 0, 'requests': 0}
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['pools'] += 1
+            stats['connections_created'] += pool.num_connections
+            stats['connections_expired'] += getattr(pool, 'expired_connections', 0)
+            stats['requests'] += pool.num_requests
+            if pool.pool is not None:
+                stats['connections_idle'] += len([conn for conn in list(pool.pool.queue) if conn is not None])
+        return stats
+
+
+def _close_thread_session(client_ref, key):
+    client = client_ref()
+    if client is not None:
+        client._close_session(key)
+
 
 class Client(object):
     """
@@ -35,60 +145,289 @@ class Client(object):
 
     def __init__(self, base_url,
                  username=None, password=None,
-                 ssl_verify=False, timeout=None):
+                 ssl_verify=False, timeout=None,
+                 pool_connections=None, pool_maxsize=None, pool_block=None, keep_alive_timeout=None,
+                 json_codec=None, compression=None, compression_level=6, compression_threshold=1024,
+                 retry_policy=None, session_per_thread=False,
+                 balancing=None, failure_threshold=3, ejection_time=30):
         """
-        :param base_url: ATSD url
+        :param base_url: ATSD url, or `list` of urls of ATSD nodes, or `str` with comma-separated urls
         :param username: login
         :param password:
         :param ssl_verify: verify ssl certificate
         :param timeout: request timeout
+        :param pool_connections: number of connection pools to cache (default 10)
+        :param pool_maxsize: maximum number of connections kept open in the pool (default 10)
+        :param pool_block: wait for a free connection instead of opening a new one when the pool is exhausted
+        (default False)
+        :param keep_alive_timeout: seconds after which an idle pooled connection is closed instead of reused
+        (default None - reuse idle connections indefinitely)
+        :param json_codec: JSON codec for request and response bodies: 'json', 'orjson', 'ujson', 'rapidjson'
+        or 'auto' to use the fastest installed one (default 'json')
+        :param compression: compress bodies of POST, PUT and PATCH requests: 'gzip' or 'deflate'
+        (default None - no compression)
+        :param compression_level: compression level from 1 (fastest) to 9 (smallest) (default 6)
+        :param compression_threshold: minimum body size in bytes to compress (default 1024)
+        :param retry_policy: :class:`.RetryPolicy` or maximum number of attempts for the default policy
+        (default None - no retries)
+        :param session_per_thread: create a separate session with its own connection pool for each thread
+        using the client, instead of one session shared by all threads (default False)
+        :param balancing: strategy to distribute reads between multiple nodes: 'round_robin', 'least_outstanding',
+        'latency_weighted' or object with select(nodes) method (default 'round_robin')
+        :param failure_threshold: number of consecutive failures after which a node is ejected (default 3)
+        :param ejection_time: seconds a failed node is ejected for, doubled on repeated ejections (default 30)
         """
         logging.debug('Connecting to ATSD at %s as %s user.' % (base_url, username))
-        self.context = urljoin(base_url, 'api/')
-        session = requests.Session()
-        if ssl_verify is False or ssl_verify == 'False':
-            session.verify = False
-        if username is not None and password is not None:
-            session.auth = (username, password)
-        self.session = session
+        urls = base_url.split(',') if isinstance(base_url, str) else list(base_url)
+        urls = [url.strip() for url in urls if url.strip()]
+        if not urls:
+            raise ValueError('ATSD url is required')
+        self.context = urljoin(urls[0], 'api/')
+        #: :class:`.NodePool` if the client has multiple urls, None otherwise
+        self.nodes = NodePool(urls, balancing, int(failure_threshold), float(ejection_time)) \
+            if len(urls) > 1 else None
+        self.ssl_verify = not (ssl_verify is False or ssl_verify == 'False')
+        self.auth = (username, password) if username is not None and password is not None else None
+        self.pool_connections = int(pool_connections) if pool_connections is not None else DEFAULT_POOLSIZE
+        self.pool_maxsize = int(pool_maxsize) if pool_maxsize is not None else DEFAULT_POOLSIZE
+        self.pool_block = to_bool(pool_block) if pool_block is not None else DEFAULT_POOLBLOCK
+        self.keep_alive_timeout = float(keep_alive_timeout) if keep_alive_timeout is not None else None
+        self.session_per_thread = to_bool(session_per_thread)
+        self._local = threading.local()
+        # sessions created by the client: ``id: (session, adapter)`` pairs
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._shared = None if self.session_per_thread else self._open_session()
         self.timeout = int(timeout) if timeout is not None else None
+        self.json_codec = get_codec(json_codec)
+        if compression in ('', 'None'):
+            compression = None
+        if compression not in (None, 'gzip', 'deflate'):
+            raise ValueError('Unsupported compression: ' + str(compression))
+        self.compression = compression
+        self.compression_level = int(compression_level)
+        self.compression_threshold = int(compression_threshold)
+        if retry_policy in ('', 'None'):
+            retry_policy = None
+        if retry_policy is not None and not isinstance(retry_policy, RetryPolicy):
+            retry_policy = RetryPolicy(max_attempts=int(retry_policy))
+        self.retry_policy = retry_policy
+        #: `dict` of request hooks registered with :meth:`add_hook`
+        self.hooks = {'before_send': [], 'after_response': [], 'on_error': []}
         self.client_version = sys.modules[_jsonutil.__package__].__version__
         self.python_version = sys.version_info[:3]
 
-    def _request(self, method, path, params=None, json=None, data=None, portal=False, portal_file=None):
+    def _request(self, method, path, params=None, json=None, data=None, portal=False, portal_file=None,
+                 stream=False, headers=None):
+        if not (self.hooks['before_send'] or self.hooks['after_response'] or self.hooks['on_error']):
+            return self._execute(method, path, params, json, data, portal, portal_file, stream, headers, None)
+        event = RequestEvent(method, path)
+        try:
+            result = self._execute(method, path, params, json, data, portal, portal_file, stream, headers, event)
+        except Exception as e:
+            event.error = e
+            self._dispatch('on_error', event)
+            raise
+        self._dispatch('after_response', event)
+        return result
+
+    def _execute(self, method, path, params, json, data, portal, portal_file, stream, headers, event):
+        started = time.perf_counter()
+        request_headers = {
+            'user-agent': 'atsd-api-python/{} python/{}.{}.{}'.format(self.client_version, *self.python_version)}
+        if headers is not None:
+            request_headers.update(headers)
+        body = _jsonutil.serialize(json)
+        if body is not None:
+            data = self.json_codec.dumps(body)
+            request_headers['Content-Type'] = 'application/json'
+        if self.compression is not None and method in ('POST', 'PUT', 'PATCH') and data is not None \
+                and 'Content-Encoding' not in request_headers:
+            data = self._compress(data, request_headers)
         request = requests.Request(
             method=method,
             url=urljoin(self.context, path),
             data=data,
-            json=_jsonutil.serialize(json),
             params=params,
-            headers={
-                'user-agent': 'atsd-api-python/{} python/{}.{}.{}'.format(self.client_version, *self.python_version)}
+            headers=request_headers
         )
-        prepared_request = self.session.prepare_request(request)
-        response = self.session.send(prepared_request, timeout=self.timeout, stream=portal)
+        session = self.session
+        prepared_request = session.prepare_request(request)
+        if event is not None:
+            event.serialization_time = time.perf_counter() - started
+            event.request_bytes = len(prepared_request.body) if isinstance(prepared_request.body, (bytes, str)) \
+                else int(prepared_request.headers.get('Content-Length', 0))
+            self._dispatch('before_send', event)
+            started = time.perf_counter()
+        if self.nodes is None:
+            response = self._send(session, prepared_request, method, path, stream=portal or stream)
+        else:
+            response = self._send_balanced(session, prepared_request, params, method, path, stream=portal or stream)
+        if event is not None:
+            event.network_time = time.perf_counter() - started
+            event.status = response.status_code
+            content_length = response.headers.get('Content-Length')
+            event.response_bytes = len(response.content) if not (portal or stream) \
+                else int(content_length) if content_length is not None else None
+            started = time.perf_counter()
         if not (200 <= response.status_code < 300):
             raise ServerException(response.status_code, response.text)
+        if stream:
+            return response
         try:
             if portal:
                 if not portal_file:
-                    portal_name = response.headers.get("Content-Disposition").split("\"")[1]
-                    file_name = {"name": portal_name.split(".")[0],
-                                 "entity": "" if params["entity"] is None else "_{}".format(params["entity"]),
-                                 "date": datetime.datetime.now().strftime("%Y%m%d")}
-                    portal_file = "{name}{entity}_{date}.png".format(**file_name)
+                    portal_file = portal_file_name(response.headers.get("Content-Disposition"), params.get("entity"))
                 image = response.raw.read()
                 with open(portal_file, 'wb') as f:
                     f.write(image)
-            return response.json()
+            return self.json_codec.loads(response.content)
         except ValueError:
             return response.text
+        finally:
+            if event is not None:
+                event.deserialization_time = time.perf_counter() - started
+
+    def _dispatch(self, name, event):
+        for hook in self.hooks[name]:
+            try:
+                hook(event)
+            except Exception:
+                logging.warning('Request hook %s failed for %s %s', name, event.method, event.path, exc_info=True)
+
+    def add_hook(self, name, hook):
+        """
+        Register a function called with :class:`.RequestEvent` for each request.
+
+        :param name: `str` 'before_send' - after the request is serialized, 'after_response' - after the response
+        is decoded, or 'on_error' - when the request raises an exception, including error response status
+        :param hook: function of :class:`.RequestEvent`, exceptions raised by the function are logged and ignored
+        """
+        if name not in self.hooks:
+            raise ValueError('Unsupported hook: {}, expected one of {}'.format(name, sorted(self.hooks)))
+        self.hooks[name].append(hook)
+
+    def remove_hook(self, name, hook):
+        if hook in self.hooks.get(name, ()):
+            self.hooks[name].remove(hook)
+
+    def _send(self, session, prepared_request, method, path, stream):
+        policy = self.retry_policy
+        if policy is None:
+            return session.send(prepared_request, timeout=self.timeout, stream=stream)
+        attempt = 1
+        while True:
+            try:
+                response = session.send(prepared_request, timeout=self.timeout, stream=stream)
+            except policy.retryable_exceptions as e:
+                if not policy.allows(method, path, attempt):
+                    policy.record(attempt, False)
+                    raise
+                logging.debug('Retrying %s %s after attempt %d: %s', method, path, attempt, e)
+                policy.wait(attempt)
+            else:
+                if response.status_code not in policy.retry_statuses:
+                    policy.record(attempt, 200 <= response.status_code < 300)
+                    return response
+                if not policy.allows(method, path, attempt):
+                    policy.record(attempt, False)
+                    return response
+                logging.debug('Retrying %s %s after attempt %d: status %d', method, path, attempt,
+                              response.status_code)
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+                policy.wait(attempt, retry_after)
+            attempt += 1
+
+    def _send_balanced(self, session, prepared_request, params, method, path, stream):
+        policy = self.retry_policy
+        read = is_idempotent(method, path)
+        attempt = 1
+        while True:
+            response, error = self._send_nodes(session, prepared_request, params, method, path, stream, read)
+            if policy is None or (response is not None and response.status_code not in policy.retry_statuses):
+                if policy is not None:
+                    policy.record(attempt, 200 <= response.status_code < 300)
+                if error is not None:
+                    raise error
+                return response
+            if not policy.allows(method, path, attempt):
+                policy.record(attempt, False)
+                if error is not None:
+                    raise error
+                return response
+            logging.debug('Retrying %s %s after attempt %d: %s', method, path, attempt,
+                          error if error is not None else 'status {}'.format(response.status_code))
+            retry_after = None
+            if response is not None:
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+            policy.wait(attempt, retry_after)
+            attempt += 1
+
+    def _send_nodes(self, session, prepared_request, params, method, path, stream, read):
+        """
+        Send the request to nodes selected by the node pool until one of them responds.
+        Reads fail over on connection errors, timeouts and unavailable status. Writes fail over only if
+        the connection could not be established, or on any connection error if the retry policy retries inserts.
+
+        :return: (:class:`requests.Response`, None) or (None, exception raised by the last node)
+        """
+        tried = []
+        while True:
+            node = self.nodes.acquire(read, tried)
+            tried.append(node)
+            request = prepared_request.copy()
+            request.prepare_url(urljoin(node.context, path), params)
+            started = time.monotonic()
+            try:
+                response = session.send(request, timeout=self.timeout, stream=stream)
+            except RetryPolicy.retryable_exceptions as e:
+                self.nodes.release(node, time.monotonic() - started, False)
+                retry_inserts = self.retry_policy is not None and self.retry_policy.retry_inserts
+                if len(tried) == len(self.nodes) or not (read or _not_sent(e) or
+                                                         retry_inserts and isinstance(e, RequestsConnectionError)):
+                    return None, e
+                logging.debug('Failing over %s %s from %s: %s', method, path, node.url, e)
+                continue
+            failed = response.status_code in _node_failure_statuses
+            self.nodes.release(node, time.monotonic() - started, not failed)
+            if not failed or not read or len(tried) == len(self.nodes):
+                return response, None
+            logging.debug('Failing over %s %s from %s: status %d', method, path, node.url, response.status_code)
+            response.close()
+
+    def node_stats(self):
+        """Request counters and health of ATSD nodes.
+
+        :return: `list` of `dict` with url, availability, outstanding requests, number of requests, failures and
+        ejections, and average latency in seconds of each node, empty if the client has one url
+        """
+        return self.nodes.stats() if self.nodes is not None else []
+
+    def _compress(self, data, headers):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if not isinstance(data, bytes) or len(data) < self.compression_threshold:
+            return data
+        if self.compression == 'gzip':
+            data = gzip.compress(data, compresslevel=self.compression_level)
+        else:
+            data = zlib.compress(data, self.compression_level)
+        headers['Content-Encoding'] = self.compression
+        return data
 
     def post(self, path, data, params=None):
         return self._request('POST', path, params=params, json=data)
 
-    def post_plain_text(self, path, data, params=None):
-        return self._request('POST', path, params=params, data=data)
+    def post_stream(self, path, data, params=None):
+        """
+        :return: :class:`requests.Response` with unread content, must be closed by the caller
+        """
+        return self._request('POST', path, params=params, json=data, stream=True)
+
+    def post_plain_text(self, path, data, params=None, headers=None):
+        return self._request('POST', path, params=params, data=data, headers=headers)
 
     def patch(self, path, data):
         return self._request('PATCH', path, json=data)
@@ -96,11 +435,89 @@ class Client(object):
     def get(self, path, params=None, portal=False, portal_file=None):
         return self._request('GET', path, params=params, portal=portal, portal_file=portal_file)
 
+    def get_stream(self, path, params=None):
+        """
+        :return: :class:`requests.Response` with unread content, must be closed by the caller
+        """
+        return self._request('GET', path, params=params, stream=True)
+
     def put(self, path, data):
         return self._request('PUT', path, json=data)
 
     def delete(self, path):
         return self._request('DELETE', path)
 
+    # ---- sessions
+
+    def _open_session(self):
+        session = requests.Session()
+        session.verify = self.ssl_verify
+        session.auth = self.auth
+        adapter = PoolAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block, keep_alive_timeout=self.keep_alive_timeout)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with self._sessions_lock:
+            self._sessions[id(session)] = (session, adapter)
+        return session, adapter
+
+    def _thread_session(self):
+        current = getattr(self._local, 'session', None)
+        if current is None or id(current[0]) not in self._sessions:
+            current = self._local.session = self._open_session()
+            # close the session when the thread which owns it is garbage collected
+            weakref.finalize(threading.current_thread(), _close_thread_session, weakref.ref(self), id(current[0]))
+        return current
+
+    def _close_session(self, key):
+        with self._sessions_lock:
+            current = self._sessions.pop(key, None)
+        if current is not None:
+            current[0].close()
+
+    @property
+    def session(self):
+        """:class:`requests.Session` used by the current thread"""
+        return (self._shared or self._thread_session())[0]
+
+    @property
+    def adapter(self):
+        """:class:`PoolAdapter` of the session used by the current thread"""
+        return (self._shared or self._thread_session())[1]
+
+    def close_thread_session(self):
+        """Close the session of the current thread if sessions are created per thread,
+        for example before a worker thread exits."""
+        current = getattr(self._local, 'session', None)
+        if current is not None:
+            self._local.session = None
+            self._close_session(id(current[0]))
+
+    def pool_stats(self):
+        """Connection pool usage counters summed over sessions of all threads.
+
+        :return: `dict` with number of sessions, pools, created, expired and idle connections, and requests sent
+        """
+        with self._sessions_lock:
+            adapters = [adapter for _, adapter in self._sessions.values()]
+        stats = {'sessions': len(adapters), 'pools': 0, 'connections_created': 0, 'connections_expired': 0,
+                 'connections_idle': 0, 'requests': 0}
+        for adapter in adapters:
+            for name, value in adapter.pool_stats().items():
+                stats[name] += value
+        return stats
+
     def close(self):
-        self.session.close()
+        """Close connections of all sessions. The client can still be used, new connections are opened on demand."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            if self.session_per_thread:
+                self._sessions.clear()
+        for session, _ in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,11 +1,14 @@
 #------------------------------------------------------------------------------INNER
 display_series_threshold = 20
 display_series_part = 10
+stream_chunk_bytes = 64 * 1024
 
 #------------------------------------------------------------------------------URLS
 #---------------------------------------------Data
 series_insert_url            = 'v1/series/insert'
 series_query_url             = 'v1/series/query'
+series_csv_insert_url        = 'v1/series/csv/{entity}'
+series_url_query_url         = 'v1/series/{format}/{entity}/{metric}'
 properties_insert_url        = 'v1/properties/insert'
 properties_query_url         = 'v1/properties/query'
 properties_types_url         = 'v1/properties/{entity}/types'
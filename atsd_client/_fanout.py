@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryPartition(object):
+    """
+    Group of queries sent in one request
+    """
+
+    def __init__(self, index, queries):
+        #: `int` sequence number of the partition starting from 0
+        self.index = index
+        #: `list` of queries in the request
+        self.queries = queries
+        #: `int` number of objects returned
+        self.result_count = 0
+        #: `float` request duration in seconds including response decoding
+        self.elapsed = None
+
+    def __repr__(self):
+        return "<QueryPartition index={}, queries={}, results={}, elapsed={}>".format(
+            self.index, len(self.queries), self.result_count, self.elapsed)
+
+
+class ParallelQueryResult(list):
+    """
+    List of objects returned by queries executed concurrently, in the order of queries,
+    with statistics of each request in `partitions`.
+    """
+
+    def __init__(self, partitions):
+        super(ParallelQueryResult, self).__init__()
+        #: `list` of :class:`QueryPartition`
+        self.partitions = partitions
+        #: `float` total duration in seconds
+        self.elapsed = None
+
+    @property
+    def max_latency(self):
+        """`float` duration of the slowest request in seconds"""
+        return max([partition.elapsed for partition in self.partitions if partition.elapsed is not None] or [0.0])
+
+
+def partition(queries, queries_per_request=1):
+    """
+    :param queries: `list` of queries
+    :param queries_per_request: `int` maximum number of queries per partition
+    :return: `list` of :class:`QueryPartition`
+    """
+    size = max(1, int(queries_per_request))
+    return [QueryPartition(index, queries[start:start + size])
+            for index, start in enumerate(range(0, len(queries), size))]
+
+
+def run_partitions(call, partitions, max_workers=1):
+    """
+    Execute call for each partition with a thread pool and collect results in the order of partitions.
+    The first exception raised by call is re-raised after running requests are completed.
+
+    :param call: function which receives the `list` of queries and returns a `list` of objects
+    :param partitions: `list` of :class:`QueryPartition`
+    :param max_workers: `int` number of concurrent requests
+    :return: :class:`ParallelQueryResult`
+    """
+    result = ParallelQueryResult(partitions)
+    start = time.monotonic()
+
+    def execute(part):
+        part_start = time.monotonic()
+        try:
+            return call(part.queries)
+        finally:
+            part.elapsed = time.monotonic() - part_start
+
+    if max_workers is None or max_workers <= 1 or len(partitions) <= 1:
+        responses = [execute(part) for part in partitions]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(partitions))) as executor:
+            responses = list(executor.map(execute, partitions))
+    for part, response in zip(partitions, responses):
+        part.result_count = len(response)
+        result.extend(response)
+    result.elapsed = time.monotonic() - start
+    return result
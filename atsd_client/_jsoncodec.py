@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import importlib
+import json
+
+
+class JsonCodec(object):
+    """
+    JSON encoder and decoder used for request and response bodies
+    """
+
+    def __init__(self, name, dumps, loads):
+        #: `str` codec name
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+
+    def dumps(self, obj):
+        """
+        :param obj: JSON-compatible object
+        :return: `bytes` UTF-8 encoded JSON
+        """
+        return self._dumps(obj)
+
+    def loads(self, content):
+        """
+        :param content: `bytes` | `str` JSON document
+        :return: decoded object, raises ValueError if content is not valid JSON
+        """
+        return self._loads(content)
+
+    def __repr__(self):
+        return '<JsonCodec name={}>'.format(self.name)
+
+
+def _to_text(content):
+    return content.decode('utf-8') if isinstance(content, (bytes, bytearray)) else content
+
+
+def _json_codec():
+    return JsonCodec('json', lambda obj: json.dumps(obj).encode('utf-8'), json.loads)
+
+
+def _orjson_codec():
+    orjson = importlib.import_module('orjson')
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    return JsonCodec('orjson', lambda obj: orjson.dumps(obj, option=option), orjson.loads)
+
+
+def _ujson_codec():
+    ujson = importlib.import_module('ujson')
+    return JsonCodec('ujson', lambda obj: ujson.dumps(obj).encode('utf-8'),
+                     lambda content: ujson.loads(_to_text(content)))
+
+
+def _rapidjson_codec():
+    rapidjson = importlib.import_module('rapidjson')
+    return JsonCodec('rapidjson', lambda obj: rapidjson.dumps(obj).encode('utf-8'),
+                     lambda content: rapidjson.loads(_to_text(content)))
+
+
+_codecs = {'json': _json_codec, 'orjson': _orjson_codec, 'ujson': _ujson_codec, 'rapidjson': _rapidjson_codec}
+
+#: codec names in order of preference for 'auto'
+_preference = ('orjson', 'ujson', 'rapidjson', 'json')
+
+
+def get_codec(codec=None):
+    """
+    :param codec: `str` codec name: 'json', 'orjson', 'ujson', 'rapidjson' or 'auto' for the fastest installed one,
+    or :class:`JsonCodec` instance. Default: 'json'
+    :return: :class:`JsonCodec`
+    """
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is None:
+        codec = 'json'
+    if codec == 'auto':
+        for name in _preference:
+            try:
+                return _codecs[name]()
+            except ImportError:
+                continue
+    if codec not in _codecs:
+        raise ValueError('Unsupported JSON codec: ' + str(codec))
+    try:
+        return _codecs[codec]()
+    except ImportError:
+        raise ImportError("JSON codec '{0}' requires '{0}' module. Install it with: pip install {0}".format(codec))
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import codecs
+import json
+import re
+
+_structural = re.compile(r'[\[\]{}"]')
+_string_end = re.compile(r'["\\]')
+_data_key = re.compile(r'"data"\s*:\s*$')
+# object or array without nested containers, such as a sample, matched in one step
+_flat_pattern = r'(?:\{[^\[\]{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\[\]{}"]*)*\}' \
+                r'|\[[^\[\]{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\[\]{}"]*)*\])'
+_flat = re.compile(_flat_pattern)
+_flat_sibling = re.compile(r'\s*,\s*' + _flat_pattern)
+_flat_siblings = re.compile(r'(?:\s*,\s*' + _flat_pattern + ')*')
+
+
+class _ArrayScanner(object):
+    """
+    Incremental scanner of a JSON array of objects.
+    Keeps in memory only the text of the current element, or the text of the current part of the "data" array
+    if chunk_size is set. Text of an element split across several chunks is collected in a list and joined once
+    the element is closed.
+    """
+
+    def __init__(self, chunk_size=None, loads=json.loads):
+        self.chunk_size = chunk_size
+        self.loads = loads
+        self.depth = 0
+        self.in_string = False
+        # the previous chunk ended with a backslash inside a string
+        self.escape = False
+        self.done = False
+        # captured text from previous chunks and start of the captured text in the current chunk
+        self.parts = []
+        self.mark = None
+        # parsed element fields preceding the "data" array, set only if chunk_size is specified
+        self.header = None
+        self.in_data = False
+        # number of samples in the captured part of the "data" array and samples left after its end
+        self.samples = 0
+        self.rest = []
+        self.chunks = 0
+
+    def feed(self, text):
+        result = []
+        pos = 0
+        if self.escape and text:
+            self.escape = False
+            pos = 1
+        while not self.done:
+            if self.in_string:
+                match = _string_end.search(text, pos)
+                if match is None:
+                    break
+                if match.group() == '\\':
+                    if match.end() >= len(text):
+                        self.escape = True
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self.in_string = False
+                continue
+            match = _structural.search(text, pos)
+            if match is None:
+                if self.depth == 0 and text[pos:].strip():
+                    raise ValueError('JSON array expected')
+                break
+            char, start = match.group(), match.start()
+            if self.depth == 0 and (char != '[' or text[pos:start].strip()):
+                raise ValueError('JSON array expected')
+            pos = match.end()
+            if char == '"':
+                self.in_string = True
+            elif char in '[{':
+                self._open(char, text, start)
+                flat = _flat.match(text, start)
+                if flat is not None:
+                    pos = flat.end()
+                    self._close(text, pos - 1, pos, result)
+                    pos = self._skip_siblings(text, pos, result)
+            else:
+                self._close(text, start, pos, result)
+        if self.done:
+            if text[pos:].strip():
+                raise ValueError('Unexpected data after JSON array')
+        elif self.mark is not None:
+            self.parts.append(text[self.mark:])
+            self.mark = 0
+        return result
+
+    def close(self):
+        if not self.done:
+            raise ValueError('Incomplete JSON array')
+
+    def _open(self, char, text, start):
+        self.depth += 1
+        if self.depth == 2:
+            self.mark = start
+        elif self.depth == 3 and char == '[' and self.chunk_size is not None and self.header is None:
+            head = self._captured(text, start)
+            if _data_key.search(head):
+                key = head.rfind('"data"')
+                self.header = self.loads(head[:key].rstrip().rstrip(',') + '}')
+                self.in_data = True
+            else:
+                self.parts, self.mark = [head], start
+        elif self.depth == 4 and self.in_data and self.mark is None:
+            self.mark = start
+
+    def _close(self, text, start, end, result):
+        self.depth -= 1
+        if self.depth == 3 and self.in_data:
+            self.samples += 1
+            if self.samples >= self.chunk_size:
+                result.append(dict(self.header, data=self._data_part(text, end)))
+                self.chunks += 1
+        elif self.depth == 2 and self.in_data:
+            self.in_data = False
+            self.rest = self._data_part(text, start) if self.samples else []
+            self.mark = end
+        elif self.depth == 1:
+            captured = self._captured(text, end)
+            if self.header is not None:
+                trailer = self.loads('{' + captured.lstrip().lstrip(',').lstrip())
+                if self.rest or trailer or self.chunks == 0:
+                    element = dict(self.header)
+                    element.update(trailer)
+                    element['data'] = self.rest
+                    result.append(element)
+                self.header, self.rest, self.chunks = None, [], 0
+            else:
+                result.append(self.loads(captured))
+        elif self.depth == 0:
+            self.done = True
+
+    def _skip_siblings(self, text, pos, result):
+        if self.in_data:
+            if not self.samples:
+                return pos
+            end = _flat_siblings.match(text, pos).end()
+            count = len(_flat.findall(text, pos, end))
+            if self.samples + count < self.chunk_size:
+                self.samples += count
+                return end
+            # the part of the "data" array ends among the skipped samples
+            for _ in range(self.chunk_size - self.samples):
+                pos = _flat_sibling.match(text, pos).end()
+            self.samples = self.chunk_size
+            result.append(dict(self.header, data=self._data_part(text, pos)))
+            self.chunks += 1
+        elif self.depth >= 2:
+            pos = _flat_siblings.match(text, pos).end()
+        return pos
+
+    def _captured(self, text, end):
+        self.parts.append(text[self.mark:end])
+        captured = ''.join(self.parts)
+        self.parts, self.mark = [], None
+        return captured
+
+    def _data_part(self, text, end):
+        self.samples = 0
+        return self.loads('[' + self._captured(text, end) + ']')
+
+
+def iter_array(chunks, chunk_size=None, encoding='utf-8', loads=json.loads):
+    """
+    Decode elements of a JSON array from an iterable of byte chunks as they arrive.
+
+    :param chunks: iterable of `bytes`
+    :param chunk_size: `int` if set, "data" arrays of elements are split into parts of at most chunk_size items,
+    each part is yielded as a copy of the element with the fields preceding "data". Fields following "data"
+    are included in the last part only.
+    :param encoding: `str` response encoding
+    :param loads: function which decodes JSON text
+    :return: generator of `dict`
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    scanner = _ArrayScanner(chunk_size, loads)
+    for chunk in chunks:
+        for element in scanner.feed(decoder.decode(chunk)):
+            yield element
+    for element in scanner.feed(decoder.decode(b'', final=True)):
+        yield element
+    scanner.close()
@@ -24,6 +24,12 @@ from datetime import datetime
 _underscorer1 = re.compile(r'(.)([A-Z][a-z]+)')
 _underscorer2 = re.compile('([a-z0-9])([A-Z])')
 
+# model class -> deserializer function
+_deserializers = {}
+# camelCase key -> snake_case key
+_snake_case_keys = {}
+_snake_case_keys_limit = 10000
+
 from ._time_utilities import to_iso
 
 
@@ -62,23 +68,44 @@ def serialize(target):
 def deserialize(target, model_class):
     if isinstance(target, (list, tuple)):
         return [deserialize(el, model_class) for el in target]
+    deserializer = _deserializers.get(model_class)
+    if deserializer is None:
+        deserializer = _deserializers[model_class] = _compile_deserializer(model_class)
     try:
-        args = inspect.getfullargspec(model_class.__init__).args
-        args.remove('self')
+        return deserializer(target)
+    except:
+        raise ValueError(str(target) + ' could not be deserialized to ' + str(model_class))
+
+
+def _compile_deserializer(model_class):
+    """
+    Create function which builds model_class instance from a dictionary with camelCase keys.
+    Keys matching constructor arguments are passed to the constructor, other keys are set as attributes.
+    """
+    args = frozenset(inspect.getfullargspec(model_class.__init__).args) - {'self'}
+
+    def deserializer(target):
         params = {}
-        target = {to_snake_case(k): v for k, v in target.items()}
-        for attr in target:
+        attributes = []
+        for key, value in target.items():
+            attr = to_snake_case(key)
             if attr in args:
-                params[attr] = target[attr]
+                params[attr] = value
+            else:
+                attributes.append((attr, value))
         result_object = model_class(**params)
-        for attr in target:
-            if attr not in args:
-                setattr(result_object, attr, target[attr])
-    except:
-        raise ValueError(str(target) + ' could not be deserialized to ' + str(model_class))
-    return result_object
+        for attr, value in attributes:
+            setattr(result_object, attr, value)
+        return result_object
+
+    return deserializer
 
 
 def to_snake_case(cc_str):
-    subbed = _underscorer1.sub(r'\1_\2', cc_str)
-    return _underscorer2.sub(r'\1_\2', subbed).lower()
+    snake_case = _snake_case_keys.get(cc_str)
+    if snake_case is None:
+        subbed = _underscorer1.sub(r'\1_\2', cc_str)
+        snake_case = _underscorer2.sub(r'\1_\2', subbed).lower()
+        if len(_snake_case_keys) < _snake_case_keys_limit:
+            _snake_case_keys[cc_str] = snake_case
+    return snake_case
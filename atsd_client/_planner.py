@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import copy
+from datetime import timedelta
+
+from ._time_utilities import to_milliseconds, to_date, to_iso
+
+_unit_milliseconds = {
+    'MILLISECOND': 1,
+    'SECOND': 1000,
+    'MINUTE': 60 * 1000,
+    'HOUR': 60 * 60 * 1000,
+    'DAY': 24 * 60 * 60 * 1000,
+    'WEEK': 7 * 24 * 60 * 60 * 1000
+}
+
+
+def query_field(query, name):
+    return query.get(name) if isinstance(query, dict) else getattr(query, name, None)
+
+
+def copy_query(query, **fields):
+    """
+    Copy query replacing the specified fields, fields with None value are removed.
+
+    :param query: :class:`.SeriesQuery` | `dict`
+    :return: copy of the query
+    """
+    result = dict(query) if isinstance(query, dict) else copy.copy(query)
+    for name, value in fields.items():
+        if isinstance(result, dict):
+            if value is None:
+                result.pop(name, None)
+            else:
+                result[name] = value
+        elif value is None:
+            if name in vars(result):
+                delattr(result, name)
+        else:
+            setattr(result, name, value)
+    return result
+
+
+def window_milliseconds(window):
+    """
+    :param window: `int` milliseconds | :class:`datetime.timedelta` | `dict` interval with count and unit
+    from MILLISECOND to WEEK, for example {'count': 1, 'unit': 'DAY'}
+    :return: `int` duration in milliseconds
+    """
+    if isinstance(window, timedelta):
+        ms = window // timedelta(milliseconds=1)
+    elif isinstance(window, dict):
+        unit = window.get('unit')
+        if unit not in _unit_milliseconds:
+            raise ValueError('Window unit must be one of {}, found: {}'.format(sorted(_unit_milliseconds), unit))
+        ms = int(window['count'] * _unit_milliseconds[unit])
+    else:
+        ms = int(window)
+    if ms <= 0:
+        raise ValueError('Window must be positive, found: ' + str(window))
+    return ms
+
+
+def query_range(query):
+    """
+    Resolve the selection interval of a series query to milliseconds.
+
+    :param query: :class:`.SeriesQuery` | `dict` with startDate and endDate, or one of them and interval
+    :return: (`int` start, `int` end) tuple
+    """
+    start_date, end_date = query_field(query, 'startDate'), query_field(query, 'endDate')
+    try:
+        start = int(to_milliseconds(start_date)) if start_date else None
+        end = int(to_milliseconds(end_date)) if end_date else None
+    except (ValueError, OverflowError):
+        raise ValueError('Query startDate and endDate must be dates to split the query, '
+                         'found: startDate={}, endDate={}'.format(start_date, end_date))
+    interval = query_field(query, 'interval')
+    if (start is None or end is None) and interval and (start is not None or end is not None):
+        duration = window_milliseconds(interval)
+        start = end - duration if start is None else start
+        end = start + duration if end is None else end
+    if start is None or end is None:
+        raise ValueError('Query must have startDate and endDate, or one of them and interval with a fixed unit, '
+                         'to be split')
+    return start, end
+
+
+def aggregate_period(query):
+    """
+    Resolve the aggregation period of a series query.
+
+    :param query: :class:`.SeriesQuery` | `dict`
+    :return: (`int` period in milliseconds, `str` period alignment) tuple, or None if samples are not aggregated
+    """
+    aggregate = query_field(query, 'aggregate')
+    if not aggregate:
+        return None
+    types = query_field(aggregate, 'types') or [query_field(aggregate, 'type') or 'DETAIL']
+    period = query_field(aggregate, 'period')
+    if not period or all(aggregate_type == 'DETAIL' for aggregate_type in types):
+        return None
+    if period.get('unit') not in _unit_milliseconds:
+        raise ValueError('Aggregation period unit must be one of {} to split the query, found: {}'.format(
+            sorted(_unit_milliseconds), period.get('unit')))
+    return window_milliseconds(period), period.get('align')
+
+
+def split_range(start, end, window, origin=None):
+    """
+    :param start: `int` milliseconds, inclusive
+    :param end: `int` milliseconds, exclusive
+    :param window: `int` window duration in milliseconds
+    :param origin: `int` milliseconds from which window boundaries are counted. Default: start
+    :return: `list` of contiguous (start, end) tuples covering the range
+    """
+    first = start if origin is None else origin + (start - origin) // window * window
+    return [(max(window_start, start), min(window_start + window, end))
+            for window_start in range(first, end, window)]
+
+
+def window_queries(query, windows):
+    """
+    :param query: :class:`.SeriesQuery` | `dict`
+    :param windows: `list` of (start, end) tuples in milliseconds
+    :return: `list` of query copies restricted to each window
+    """
+    return [copy_query(query, startDate=to_iso(to_date(start)), endDate=to_iso(to_date(end)), interval=None)
+            for start, end in windows]
+
+
+def stitch_series(series_list):
+    """
+    Merge series with the same entity, metric and tags returned for consecutive windows.
+
+    :param series_list: `list` of :class:`.Series` in window order
+    :return: `list` of :class:`.Series` in order of first appearance
+    """
+    stitched = {}
+    for series in series_list:
+        key = (series.entity, series.metric, tuple(sorted((series.tags or {}).items())))
+        target = stitched.get(key)
+        if target is None:
+            stitched[key] = series
+        elif series.is_columnar() and target.is_columnar():
+            target.data.extend(series.data)
+        else:
+            if target.is_columnar():
+                target.data = list(target.data)
+            target.add_samples(*series.data)
+    return list(stitched.values())
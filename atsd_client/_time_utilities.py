@@ -1,13 +1,97 @@
 import calendar
 import numbers
-from datetime import datetime
+import re
+from datetime import datetime, timedelta, timezone
 
-import pytz
 import sys
 import time
-from dateutil.parser import parse
-from dateutil.tz import tzutc
-from tzlocal import get_localzone
+
+# strict ISO 8601 format returned by the server, for example 2018-01-01T00:00:00.000Z or 2018-01-01T03:00:00+03:00
+_iso_format = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:[.,](\d+))?(Z|[+-]\d\d(?::?\d\d)?)\Z')
+
+
+def get_localzone():
+    """
+    :return: local time zone, tzlocal is imported on first use
+    """
+    from tzlocal import get_localzone
+    return get_localzone()
+
+
+def parse(date):
+    """
+    Parse date in any format supported by dateutil, dateutil is imported on first use.
+
+    :param date: `str`
+    :return: :class:`datetime`
+    """
+    from dateutil.parser import parse
+    return parse(date)
+
+
+def _offset_seconds(offset):
+    if offset == 'Z':
+        return 0
+    seconds = int(offset[1:3]) * 3600 + (int(offset[-2:]) * 60 if len(offset) > 3 else 0)
+    return -seconds if offset[0] == '-' else seconds
+
+
+def _milliseconds(seconds, microsecond):
+    """
+    :param seconds: `int` seconds since epoch
+    :param microsecond: `int` microseconds within the second
+    :return: `int` milliseconds, or `float` if the time has a fraction of millisecond
+    """
+    if microsecond % 1000 == 0:
+        return seconds * 1000 + microsecond // 1000
+    return seconds * 1000 + microsecond / 1000.0
+
+
+def _iso_milliseconds(date, days=None):
+    """
+    Convert string in strict ISO 8601 format with time zone to milliseconds without dateutil.
+
+    :param date: `str`
+    :param days: `dict` cache of ``yyyy-MM-dd: seconds at midnight UTC`` pairs
+    :return: timestamp in milliseconds or None if date has a different format
+    """
+    match = _iso_format.match(date)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    hour, minute, second = int(hour), int(minute), int(second)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    midnight = days.get(date[:10]) if days is not None else None
+    if midnight is None:
+        try:
+            midnight = calendar.timegm(datetime(int(year), int(month), int(day)).timetuple())
+        except ValueError:
+            return None
+        if days is not None:
+            days[date[:10]] = midnight
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    seconds = midnight + hour * 3600 + minute * 60 + second - _offset_seconds(offset)
+    return _milliseconds(seconds, microsecond)
+
+
+def _iso_date(date):
+    """
+    Parse string in strict ISO 8601 format with time zone without dateutil.
+
+    :param date: `str`
+    :return: :class:`datetime` in UTC or None if date has a different format
+    """
+    match = _iso_format.match(date)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    try:
+        dt = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                      int(fraction[:6].ljust(6, '0')) if fraction else 0)
+    except ValueError:
+        return None
+    return (dt - timedelta(seconds=_offset_seconds(offset))).replace(tzinfo=timezone.utc)
 
 
 def to_milliseconds(date):
@@ -22,14 +106,33 @@ def to_milliseconds(date):
         return date
 
     elif isinstance(date, (bytes, str)):
+        if isinstance(date, str):
+            ms = _iso_milliseconds(date)
+            if ms is not None:
+                return ms
         dt = parse(date)
     elif isinstance(date, datetime):
         dt = date
     else:
         raise ValueError('time must be either number, datetime instance or str')
-    dt_utc = timezone_ensure(dt).astimezone(tzutc())
-    ms = (calendar.timegm(dt_utc.timetuple()) + dt_utc.microsecond / 1000000.0) * 1000
-    return ms
+    dt_utc = timezone_ensure(dt).astimezone(timezone.utc)
+    return _milliseconds(calendar.timegm(dt_utc.timetuple()), dt_utc.microsecond)
+
+
+def to_milliseconds_many(dates):
+    """
+    Convert a sequence of dates to milliseconds. Faster than calling to_milliseconds for each element
+    if dates are strings in ISO format returned by the server.
+
+    :param dates: iterable of None | `str` in iso format | :class:`datetime` | `int`
+    :return: `list` of timestamps in milliseconds
+    """
+    days = {}
+    result = []
+    for date in dates:
+        ms = _iso_milliseconds(date, days) if isinstance(date, str) else None
+        result.append(ms if ms is not None else to_milliseconds(date))
+    return result
 
 
 def to_date(time):
@@ -43,9 +146,9 @@ def to_date(time):
     if isinstance(time, datetime):
         return timezone_ensure(time)
     elif isinstance(time, (bytes, str)):
-        date = parse(time)
+        date = (_iso_date(time) if isinstance(time, str) else None) or parse(time)
     elif isinstance(time, numbers.Number):
-        date = pytz.utc.localize(datetime.utcfromtimestamp(float(time) * 0.001))
+        date = datetime.utcfromtimestamp(float(time) * 0.001).replace(tzinfo=timezone.utc)
     else:
         raise ValueError('time must be either datetime instance, str or number')
     return timezone_ensure(date)
@@ -71,12 +174,14 @@ def to_iso(date):
     return iso
 
 
-def timezone_ensure(datetime_obj, tz=get_localzone()):
+def timezone_ensure(datetime_obj, tz=None):
     """
     :param datetime_obj: datetime object'
-    :param tz: _datetime.tzinfo
+    :param tz: _datetime.tzinfo. Default: local time zone
     :return: datetime instance
     """
+    if tz is None:
+        tz = get_localzone()
     if datetime_obj.tzinfo is None:
         return tz.localize(datetime_obj)
     else:
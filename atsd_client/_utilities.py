@@ -1,3 +1,6 @@
+import datetime
+
+
 def copy_not_empty_attrs(src, dst):
     if src is not None and dst is not None:
         for attribute in src.__dict__:
@@ -6,6 +9,25 @@ def copy_not_empty_attrs(src, dst):
                 setattr(dst, attribute, value)
 
 
+def portal_file_name(content_disposition, entity=None):
+    """
+    :param content_disposition: `str` Content-Disposition header of the portal export response
+    :param entity: `str` entity name of a template portal
+    :return: `str` {portal-name}[_{entity_name}]_{yyyymmdd}.png
+    """
+    portal_name = content_disposition.split("\"")[1]
+    file_name = {"name": portal_name.split(".")[0],
+                 "entity": "" if entity is None else "_{}".format(entity),
+                 "date": datetime.datetime.now().strftime("%Y%m%d")}
+    return "{name}{entity}_{date}.png".format(**file_name)
+
+
+def to_bool(value):
+    if isinstance(value, (bytes, str)):
+        return value.strip().lower() == 'true'
+    return bool(value)
+
+
 class NoneDict(dict):
     def __init__(self, args, **kwargs):
             self.update(args, **kwargs) if args is not None else None
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import itertools
+import random
+import threading
+import time
+
+from requests.compat import urljoin
+
+
+class Node(object):
+    """
+    ATSD node with request counters and health state
+    """
+
+    def __init__(self, url):
+        #: `str` base url of the node
+        self.url = url
+        #: `str` url of the API
+        self.context = urljoin(url, 'api/')
+        #: `int` number of requests being executed
+        self.outstanding = 0
+        #: `int` number of completed requests
+        self.requests = 0
+        #: `int` number of failed requests
+        self.failures = 0
+        #: `int` number of failed requests since the last successful one
+        self.consecutive_failures = 0
+        #: `int` number of times the node was ejected
+        self.ejections = 0
+        #: `float` exponentially weighted average duration of successful requests in seconds
+        self.latency = None
+        #: `float` time.monotonic() value until which the node is ejected, None if the node is healthy
+        self.ejected_until = None
+        self._ejection_streak = 0
+
+    def available(self, now):
+        """
+        :return: True if the node is healthy or its ejection time has passed
+        """
+        return self.ejected_until is None or self.ejected_until <= now
+
+    def to_dict(self):
+        now = time.monotonic()
+        return {'url': self.url, 'available': self.available(now), 'outstanding': self.outstanding,
+                'requests': self.requests, 'failures': self.failures, 'ejections': self.ejections,
+                'latency': self.latency,
+                'ejected_for': max(0.0, self.ejected_until - now) if self.ejected_until is not None else 0.0}
+
+    def __repr__(self):
+        return '<Node url={}, outstanding={}, requests={}, failures={}, latency={}>'.format(
+            self.url, self.outstanding, self.requests, self.failures, self.latency)
+
+
+# ---- strategies
+
+class RoundRobin(object):
+    """Select nodes in turn"""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def select(self, nodes):
+        return nodes[next(self._counter) % len(nodes)]
+
+
+class LeastOutstanding(object):
+    """Select the node with the fewest requests being executed, nodes with the same number are selected in turn"""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def select(self, nodes):
+        offset = next(self._counter)
+        rotated = nodes[offset % len(nodes):] + nodes[:offset % len(nodes)]
+        return min(rotated, key=lambda node: node.outstanding)
+
+
+class LatencyWeighted(object):
+    """
+    Select nodes randomly with probability inversely proportional to their average latency.
+    Nodes without measurements are weighted as the fastest node so that they are probed.
+    """
+
+    def select(self, nodes):
+        latencies = [node.latency for node in nodes if node.latency is not None]
+        default = min(latencies) if latencies else 1.0
+        weights = [1.0 / max(node.latency if node.latency is not None else default, 0.0001) for node in nodes]
+        point = random.uniform(0, sum(weights))
+        for node, weight in zip(nodes, weights):
+            point -= weight
+            if point <= 0:
+                return node
+        return nodes[-1]
+
+
+_strategies = {'round_robin': RoundRobin, 'least_outstanding': LeastOutstanding, 'latency_weighted': LatencyWeighted}
+
+
+def get_strategy(strategy=None):
+    """
+    :param strategy: `str` 'round_robin', 'least_outstanding' or 'latency_weighted',
+    or object with select(nodes) method which returns one of the nodes. Default: 'round_robin'
+    :return: strategy object
+    """
+    if strategy is None:
+        strategy = 'round_robin'
+    if hasattr(strategy, 'select'):
+        return strategy
+    if strategy not in _strategies:
+        raise ValueError('Unsupported balancing strategy: {}, expected one of {}'.format(strategy, sorted(_strategies)))
+    return _strategies[strategy]()
+
+
+class NodePool(object):
+    """
+    ATSD nodes with passive health checking.
+    Reads are distributed with the strategy. Writes are sent to the first available node in the order of urls,
+    so that they fail over to the next node only when the preceding ones are unavailable.
+    A node is ejected after failure_threshold consecutive failures. After the ejection time passes
+    the node receives requests again: a successful request re-admits it, a failed one ejects it for twice as long,
+    up to max_ejection_time. If all nodes are ejected, the node with the earliest ejection end is used.
+    """
+
+    def __init__(self, urls, strategy=None, failure_threshold=3, ejection_time=30.0, max_ejection_time=300.0):
+        """
+        :param urls: `list` of `str` base urls
+        :param strategy: balancing strategy for reads, see :func:`get_strategy`. Default: 'round_robin'
+        :param failure_threshold: `int` number of consecutive failures after which a node is ejected. Default: 3
+        :param ejection_time: `float` seconds a node is ejected for the first time. Default: 30
+        :param max_ejection_time: `float` maximum seconds a node is ejected. Default: 300
+        """
+        if not urls:
+            raise ValueError('At least one url is required')
+        #: `list` of :class:`Node`
+        self.nodes = [Node(url) for url in urls]
+        self.strategy = get_strategy(strategy)
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.ejection_time = float(ejection_time)
+        self.max_ejection_time = float(max_ejection_time)
+        self._lock = threading.Lock()
+
+    def acquire(self, read=True, exclude=()):
+        """
+        Select a node and count the request as outstanding.
+
+        :param read: `bool` select with the strategy if True, or the first available node otherwise
+        :param exclude: nodes already tried for the request
+        :return: :class:`Node`
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [node for node in self.nodes if node not in exclude]
+            available = [node for node in candidates if node.available(now)]
+            if not available:
+                node = min(candidates, key=lambda n: n.ejected_until)
+            elif read and len(available) > 1:
+                node = self.strategy.select(available)
+            else:
+                node = available[0]
+            node.outstanding += 1
+        return node
+
+    def release(self, node, elapsed, success):
+        """
+        Record the result of a request to the node.
+
+        :param node: :class:`Node` returned by :meth:`acquire`
+        :param elapsed: `float` request duration in seconds
+        :param success: `bool` False if the node did not respond or responded with a server error
+        """
+        with self._lock:
+            node.outstanding -= 1
+            node.requests += 1
+            if success:
+                node.latency = elapsed if node.latency is None else 0.7 * node.latency + 0.3 * elapsed
+                node.consecutive_failures = 0
+                node.ejected_until = None
+                node._ejection_streak = 0
+                return
+            node.failures += 1
+            node.consecutive_failures += 1
+            now = time.monotonic()
+            if node.consecutive_failures >= self.failure_threshold and node.available(now):
+                node.ejections += 1
+                node._ejection_streak += 1
+                node.ejected_until = now + min(self.max_ejection_time,
+                                               self.ejection_time * 2 ** (node._ejection_streak - 1))
+
+    def stats(self):
+        """
+        :return: `list` of `dict` with url, availability, outstanding requests, counters and latency of each node
+        """
+        with self._lock:
+            return [node.to_dict() for node in self.nodes]
+
+    def __len__(self):
+        return len(self.nodes)
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from . import _jsonutil
+from ._planner import query_field, query_range, window_queries
+from .models import Series, Sample, SampleColumns
+
+# query fields which change the values of samples, such queries are not refreshed incrementally
+_transformations = ('aggregate', 'group', 'rate', 'interpolate', 'smooth', 'downsample')
+# query fields which are not part of the cache key
+_range_fields = ('startDate', 'endDate', 'interval', 'requestId', 'timeFormat')
+# series fields stored in binary files or in the series key, other fields such as meta are stored as is
+_series_key_fields = ('entity', 'metric', 'tags', 'data')
+
+
+class SeriesCache(object):
+    """
+    Persistent cache of series query results in a local directory.
+    Results are cached per query without the selection interval, samples are stored in binary files of times and values.
+    A query for an interval covered by the cache is served locally. If the interval extends beyond the end of
+    the cached interval, only samples after the cached end are requested and merged into the cache.
+    Samples inserted later into the cached interval are not requested again until the entry expires.
+    Results of queries which transform samples, for example aggregate, are served only for the same interval.
+    Queries with limit, and queries without explicit startDate and endDate, are not cached.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        """
+        :param directory: `str` path to the cache directory, created if it does not exist
+        :param max_bytes: `int` maximum total size of cached files, least recently used entries are removed first.
+        Default: None - no limit
+        :param max_age: `float` seconds after which an entry is discarded and requested again entirely.
+        Default: None - no limit
+        """
+        self.directory = directory
+        self.max_bytes = int(max_bytes) if max_bytes is not None else None
+        self.max_age = float(max_age) if max_age is not None else None
+        #: `int` number of queries served from the cache
+        self.hits = 0
+        #: `int` number of queries served from the cache with samples after the cached interval requested
+        self.partial_hits = 0
+        #: `int` number of queries requested entirely
+        self.misses = 0
+        #: `int` number of queries which cannot be cached
+        self.bypassed = 0
+        #: `int` number of removed entries
+        self.evictions = 0
+        self._lock = threading.RLock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get(self, query, fetch, columnar=True):
+        """
+        Get series for the query from the cache, requesting missing samples with fetch.
+
+        :param query: :class:`.SeriesQuery` | `dict`
+        :param fetch: function which receives a query and returns `list` of series `dict` objects
+        with sample times in milliseconds
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: True
+        :return: `list` of :class:`.Series` or None if the query cannot be cached
+        """
+        key = self._key(query)
+        if key is None:
+            self.bypassed += 1
+            return None
+        start, end = query_range(query)
+        now = int(time.time() * 1000)
+        with self._lock:
+            entry = self._load(key)
+        if entry is not None and entry['start'] <= start and end <= entry['end'] and \
+                (entry['incremental'] or (entry['start'], entry['end']) == (start, end)):
+            self.hits += 1
+        elif entry is not None and entry['start'] <= start and entry['incremental']:
+            self.partial_hits += 1
+            tail_start = entry['end']
+            tail = fetch(window_queries(query, [(tail_start, end)])[0])
+            entry = self._merge(entry, tail, tail_start)
+            entry['end'] = max(entry['end'], min(end, now))
+            with self._lock:
+                self._save(key, entry)
+        else:
+            self.misses += 1
+            entry = {
+                'start': start,
+                'end': min(end, now),
+                'incremental': not any(query_field(query, name) for name in _transformations),
+                'created': time.time(),
+                'series': []
+            }
+            entry = self._merge(entry, fetch(window_queries(query, [(start, end)])[0]), start)
+            with self._lock:
+                self._save(key, entry)
+        return [self._series(item, start, end, columnar) for item in entry['series']]
+
+    def stats(self):
+        """
+        :return: `dict` with hit and miss counters, hit rate, number of entries and total size in bytes
+        """
+        requests = self.hits + self.partial_hits + self.misses
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'partial_hits': self.partial_hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'evictions': self.evictions,
+            'hit_rate': float(self.hits + self.partial_hits) / requests if requests else 0.0,
+            'entries': len(entries),
+            'bytes': sum(size for _, _, size in entries)
+        }
+
+    def evict(self):
+        """Remove expired entries and least recently used entries exceeding max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            now = time.time()
+            for key, accessed, size in entries:
+                expired = self.max_age is not None and now - self._created(key) > self.max_age
+                if expired or (self.max_bytes is not None and total > self.max_bytes):
+                    self._remove(key)
+                    self.evictions += 1
+                    total -= size
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            for key, _, _ in self._entries():
+                self._remove(key)
+
+    # ---- entries
+
+    def _key(self, query):
+        serialized = _jsonutil.serialize(query)
+        if not isinstance(serialized, dict) or serialized.get('limit'):
+            return None
+        try:
+            query_range(query)
+        except ValueError:
+            return None
+        normalized = dict((name, value) for name, value in serialized.items() if name not in _range_fields)
+        return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _entries(self):
+        result = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+            key = file_name[:-len('.json')]
+            try:
+                accessed = os.path.getmtime(self._path(key, '.json'))
+                size = os.path.getsize(self._path(key, '.json')) + os.path.getsize(self._path(key, '.bin'))
+            except OSError:
+                continue
+            result.append((key, accessed, size))
+        return result
+
+    def _created(self, key):
+        try:
+            with open(self._path(key, '.json')) as f:
+                return json.load(f)['created']
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _remove(self, key):
+        for extension in ('.json', '.bin'):
+            try:
+                os.remove(self._path(key, extension))
+            except OSError:
+                pass
+
+    def _load(self, key):
+        try:
+            with open(self._path(key, '.json')) as f:
+                meta = json.load(f)
+            with open(self._path(key, '.bin'), 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        if self.max_age is not None and time.time() - meta['created'] > self.max_age:
+            self._remove(key)
+            self.evictions += 1
+            return None
+        os.utime(self._path(key, '.json'), None)
+        items = []
+        offset = 0
+        for header in meta['series']:
+            size = header['size'] * 8
+            times, values = array('q'), array('d')
+            times.frombytes(content[offset:offset + size])
+            values.frombytes(content[offset + size:offset + 2 * size])
+            offset += 2 * size
+            if meta['byteorder'] != sys.byteorder:
+                times.byteswap()
+                values.byteswap()
+            columns = SampleColumns(times, values, dict((int(i), x) for i, x in header['x'].items()),
+                                    dict((int(i), v) for i, v in header['versions'].items()))
+            items.append({'entity': header['entity'], 'metric': header['metric'], 'tags': header['tags'],
+                          'fields': header.get('fields', {}), 'integers': header.get('integers', False),
+                          'data': columns})
+        meta['series'] = items
+        return meta
+
+    def _save(self, key, entry):
+        headers = []
+        content = []
+        for item in entry['series']:
+            columns = item['data']
+            headers.append({'entity': item['entity'], 'metric': item['metric'], 'tags': item['tags'],
+                            'fields': item['fields'], 'integers': item['integers'], 'size': len(columns.times),
+                            'x': columns.x, 'versions': columns.versions})
+            content.append(columns.times.tobytes())
+            content.append(columns.values.tobytes())
+        meta = dict(entry, series=headers, byteorder=sys.byteorder)
+        for extension, data, mode in (('.bin', b''.join(content), 'wb'), ('.json', json.dumps(meta), 'w')):
+            temp_path = self._path(key, extension + '.tmp')
+            with open(temp_path, mode) as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key, extension))
+        if self.max_bytes is not None or self.max_age is not None:
+            self.evict()
+
+    # ---- samples
+
+    @staticmethod
+    def _merge(entry, series_list, start):
+        """Append samples at or after start from series_list to the series of the entry"""
+        cached = dict(((item['entity'], item['metric'], tuple(sorted(item['tags'].items()))), item)
+                      for item in entry['series'])
+        for element in series_list:
+            tags = dict(element.get('tags') or {})
+            key = (element.get('entity'), element.get('metric'), tuple(sorted(tags.items())))
+            data = element.get('data') or []
+            tail = SampleColumns.from_dicts(data)
+            tail.sort()
+            item = cached.get(key)
+            if item is None:
+                item = cached[key] = {'entity': element.get('entity'), 'metric': element.get('metric'), 'tags': tags,
+                                      'integers': True, 'data': SampleColumns()}
+                entry['series'].append(item)
+            item['fields'] = dict((name, value) for name, value in element.items()
+                                  if name not in _series_key_fields)
+            item['integers'] = item['integers'] and all(isinstance(data_unit.get('v'), int) for data_unit in data
+                                                        if data_unit.get('v') is not None)
+            item['data'].extend(SeriesCache._slice(tail, start, None))
+        return entry
+
+    @staticmethod
+    def _series(item, start, end, columnar):
+        """Create series from a cached item with samples in the interval, with values as returned by the database"""
+        series = Series.from_dict(dict(item['fields'], entity=item['entity'], metric=item['metric'],
+                                       tags=dict(item['tags'])), columnar=True)
+        columns = SeriesCache._slice(item['data'], start, end)
+        if columnar:
+            series.data = columns
+            return series
+        convert = int if item['integers'] else float
+        series.data = [Sample(convert(sample.v) if sample.v == sample.v else None, sample.t, sample.version, sample.x)
+                       for sample in columns]
+        return series
+
+    @staticmethod
+    def _slice(columns, start, end):
+        first = bisect_left(columns.times, start)
+        last = bisect_left(columns.times, end) if end is not None else len(columns.times)
+        x = dict((index - first, value) for index, value in columns.x.items() if first <= index < last)
+        versions = dict((index - first, value) for index, value in columns.versions.items() if first <= index < last)
+        return SampleColumns(columns.times[first:last], columns.values[first:last], x, versions)
+
+
+class MetadataCache(object):
+    """
+    In-memory cache of metrics, entities and entity groups returned by get methods of the services.
+    Keeps at most max_size objects, least recently used objects are removed first.
+    Names which do not exist are cached as None. Cached objects are shared between callers and should not be modified.
+    Objects are invalidated by update, create_or_replace and delete methods of the service which uses the cache,
+    changes made by other clients are visible after ttl expires.
+    """
+
+    def __init__(self, max_size=1000, ttl=300, negative_ttl=None):
+        """
+        :param max_size: `int` maximum number of cached objects. Default: 1000
+        :param ttl: `float` seconds an object is kept in the cache. Default: 300
+        :param negative_ttl: `float` seconds a missing object is kept in the cache. Default: ttl
+        """
+        self.max_size = int(max_size)
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl) if negative_ttl is not None else self.ttl
+        #: `int` number of lookups served from the cache
+        self.hits = 0
+        #: `int` number of lookups requested from the database
+        self.misses = 0
+        #: `int` number of objects removed because the cache is full
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        :param key: hashable key of the object
+        :param load: function without arguments which returns the object or None if it does not exist
+        :return: cached or loaded object
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > now:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._items[key] = (now + (self.ttl if value is not None else self.negative_ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, key=None):
+        """Remove the object with the specified key, or all objects if key is None"""
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+    @property
+    def hit_rate(self):
+        """`float` ratio of lookups served from the cache"""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        :return: `dict` with hits, misses, evictions, hit rate and number of cached objects
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'hit_rate': self.hit_rate,
+                'size': len(self._items)}
+
+    def __len__(self):
+        return len(self._items)
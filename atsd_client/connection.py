@@ -22,25 +22,62 @@ from ._client import Client
 from os import path
 import logging
 
-logging.basicConfig(level=logging.INFO)
-
 
 def connect_url(base_url,
                 username,
                 password,
                 ssl_verify=False,
-                timeout=None):
+                timeout=None,
+                pool_connections=None,
+                pool_maxsize=None,
+                pool_block=None,
+                keep_alive_timeout=None,
+                json_codec=None,
+                compression=None,
+                compression_level=6,
+                compression_threshold=1024,
+                retry_policy=None,
+                session_per_thread=False,
+                balancing=None,
+                failure_threshold=3,
+                ejection_time=30):
     """connect to ATSD using specified parameters
 
-    :param base_url: ATSD url containing protocol, hostname, and port, for example https://atsd_hostname:8443
+    :param base_url: ATSD url containing protocol, hostname, and port, for example https://atsd_hostname:8443,
+    or `list` of urls of ATSD nodes
     :param username: user name
     :param password: user password
     :param ssl_verify: verify ssl certificate (default False)
     :param timeout: request timeout in seconds (default None - no timeout)
+    :param pool_connections: number of connection pools to cache (default 10)
+    :param pool_maxsize: maximum number of connections kept open in the pool, set to the number of threads
+    sharing the client (default 10)
+    :param pool_block: wait for a free connection when the pool is exhausted (default False)
+    :param keep_alive_timeout: seconds after which an idle connection is closed instead of reused
+    (default None - no limit)
+    :param json_codec: JSON codec for request and response bodies: 'json', 'orjson', 'ujson', 'rapidjson'
+    or 'auto' to use the fastest installed one (default 'json')
+    :param compression: compress request bodies of inserts and commands: 'gzip' or 'deflate' (default None)
+    :param compression_level: compression level from 1 (fastest) to 9 (smallest) (default 6)
+    :param compression_threshold: minimum body size in bytes to compress (default 1024)
+    :param retry_policy: :class:`.RetryPolicy` or maximum number of attempts for queries and other idempotent
+    requests (default None - no retries)
+    :param session_per_thread: use a separate session and connection pool in each thread sharing the client
+    (default False)
+    :param balancing: strategy to distribute reads between multiple nodes: 'round_robin', 'least_outstanding'
+    or 'latency_weighted' (default 'round_robin')
+    :param failure_threshold: number of consecutive failures after which a node is ejected (default 3)
+    :param ejection_time: seconds a failed node is ejected for, doubled on repeated ejections (default 30)
     :return: new client instance
     """
 
-    return Client(base_url, username, password, ssl_verify, timeout)
+    logging.basicConfig(level=logging.INFO)
+    return Client(base_url, username, password, ssl_verify, timeout,
+                  pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block,
+                  keep_alive_timeout=keep_alive_timeout, json_codec=json_codec, compression=compression,
+                  compression_level=compression_level, compression_threshold=compression_threshold,
+                  retry_policy=retry_policy, session_per_thread=session_per_thread, balancing=balancing,
+                  failure_threshold=failure_threshold, ejection_time=ejection_time)
 
 
 def connect(file_name=None):
@@ -50,6 +87,8 @@ def connect(file_name=None):
     :param file_name: `str`
     """
 
+    logging.basicConfig(level=logging.INFO)
+
     if file_name is None:
         file_name = path.join(path.dirname(path.abspath(sys.argv[0])), 'connection.properties')
     f = open(file_name)
@@ -58,7 +97,11 @@ def connect(file_name=None):
 
     params = {}
     for line in f:
-        k, v = line.split('=')
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        k, v = line.split('=', 1)
         params[k.strip()] = v.strip()
+    f.close()
 
     return Client(**params)
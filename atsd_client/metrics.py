@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import logging
+import re
+import socket
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+
+from . import _constants
+
+#: upper bounds of latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class RequestEvent(object):
+    """
+    Measurements of a request passed to client hooks.
+    Fields which are not known yet when a hook is called are None.
+    """
+
+    def __init__(self, method, path):
+        #: `str` HTTP method
+        self.method = method
+        #: `str` API path, for example v1/entities/nurswgvml007
+        self.path = path
+        #: `str` API path template, for example v1/entities/{entity}
+        self.endpoint = endpoint(path)
+        #: `int` HTTP response status
+        self.status = None
+        #: `int` size of the request body in bytes as sent
+        self.request_bytes = None
+        #: `int` size of the response body in bytes, None for streamed responses without Content-Length
+        self.response_bytes = None
+        #: `float` seconds spent serializing and compressing the request body
+        self.serialization_time = None
+        #: `float` seconds from sending the request until the response is received, including retries
+        self.network_time = None
+        #: `float` seconds spent decoding the response body, None for streamed responses
+        self.deserialization_time = None
+        #: `Exception` raised by the request, set for on_error hooks
+        self.error = None
+
+    @property
+    def elapsed(self):
+        """`float` total seconds measured for the request"""
+        return sum(t for t in (self.serialization_time, self.network_time, self.deserialization_time)
+                   if t is not None)
+
+    def __repr__(self):
+        return '<RequestEvent method={}, endpoint={}, status={}, elapsed={:.6f}>'.format(
+            self.method, self.endpoint, self.status, self.elapsed)
+
+
+def _endpoint_patterns():
+    templates = set(value for name, value in vars(_constants).items()
+                    if not name.startswith('_') and isinstance(value, str))
+    patterns = []
+    for template in sorted(templates, key=lambda t: (t.count('{'), t)):
+        regex = re.sub(r'\\{\w+\\}', '[^/]+', re.escape(template))
+        patterns.append((re.compile(regex + '$'), template))
+    return patterns
+
+
+_patterns = _endpoint_patterns()
+
+
+@lru_cache(maxsize=1024)
+def endpoint(path):
+    """
+    :param path: `str` API path
+    :return: `str` API path template from the client constants, or the path without parameters if it is unknown
+    """
+    path = path.split('?', 1)[0]
+    for pattern, template in _patterns:
+        if pattern.match(path):
+            return template
+    return path
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observed values with fixed bucket upper bounds
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        #: `tuple` of bucket upper bounds in increasing order
+        self.buckets = tuple(buckets)
+        #: `list` of number of values in each bucket, the last item counts values above all bounds
+        self.counts = [0] * (len(self.buckets) + 1)
+        #: `int` number of observed values
+        self.count = 0
+        #: `float` sum of observed values
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        :param q: `float` from 0 to 1
+        :return: `float` upper bound of the bucket containing the quantile, None if nothing was observed
+        or the quantile is above the largest bound
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'buckets': dict(zip(self.buckets, self.counts)),
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+
+class EndpointMetrics(object):
+    """
+    Request counters and latency histograms of one method and endpoint
+    """
+
+    def __init__(self, method, endpoint, buckets=DEFAULT_BUCKETS):
+        self.method = method
+        self.endpoint = endpoint
+        #: `int` number of completed requests
+        self.requests = 0
+        #: `int` number of failed requests
+        self.errors = 0
+        #: `dict` of ``status: count`` pairs
+        self.statuses = {}
+        #: `int` total request body bytes
+        self.request_bytes = 0
+        #: `int` total response body bytes
+        self.response_bytes = 0
+        #: :class:`Histogram` of total request time
+        self.latency = Histogram(buckets)
+        #: :class:`Histogram` of serialization time
+        self.serialization = Histogram(buckets)
+        #: :class:`Histogram` of network time
+        self.network = Histogram(buckets)
+        #: :class:`Histogram` of deserialization time
+        self.deserialization = Histogram(buckets)
+
+    def record(self, event):
+        self.requests += 1
+        if event.error is not None:
+            self.errors += 1
+        if event.status is not None:
+            self.statuses[event.status] = self.statuses.get(event.status, 0) + 1
+        self.request_bytes += event.request_bytes or 0
+        self.response_bytes += event.response_bytes or 0
+        self.latency.observe(event.elapsed)
+        for histogram, value in ((self.serialization, event.serialization_time),
+                                 (self.network, event.network_time),
+                                 (self.deserialization, event.deserialization_time)):
+            if value is not None:
+                histogram.observe(value)
+
+    def to_dict(self):
+        return {'method': self.method, 'endpoint': self.endpoint, 'requests': self.requests, 'errors': self.errors,
+                'statuses': dict(self.statuses), 'request_bytes': self.request_bytes,
+                'response_bytes': self.response_bytes, 'latency': self.latency.to_dict(),
+                'serialization': self.serialization.to_dict(), 'network': self.network.to_dict(),
+                'deserialization': self.deserialization.to_dict()}
+
+
+class MetricsCollector(object):
+    """
+    In-memory collector of request metrics per method and endpoint.
+    Attach it to a client to record every completed and failed request.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: upper bounds of histogram buckets in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        """
+        Register the collector as after_response and on_error hook of the client.
+
+        :param client: :class:`._client.Client`
+        :return: the collector
+        """
+        client.add_hook('after_response', self.record)
+        client.add_hook('on_error', self.record)
+        return self
+
+    def detach(self, client):
+        client.remove_hook('after_response', self.record)
+        client.remove_hook('on_error', self.record)
+
+    def record(self, event):
+        """
+        :param event: :class:`RequestEvent`
+        """
+        key = (event.method, event.endpoint)
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = EndpointMetrics(event.method, event.endpoint, self.buckets)
+            metrics.record(event)
+
+    def get(self, endpoint, method='POST'):
+        """
+        :param endpoint: `str` API path template, for example v1/series/query
+        :param method: `str` HTTP method
+        :return: :class:`EndpointMetrics` or None if no requests were recorded
+        """
+        return self._endpoints.get((method, endpoint))
+
+    def endpoints(self):
+        """
+        :return: `list` of :class:`EndpointMetrics`
+        """
+        with self._lock:
+            return list(self._endpoints.values())
+
+    def snapshot(self):
+        """
+        :return: `list` of `dict` with metrics of each method and endpoint
+        """
+        with self._lock:
+            return [metrics.to_dict() for metrics in self._endpoints.values()]
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+# ---- exporters
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(collector, prefix='atsd_client'):
+    """
+    Format metrics in Prometheus text exposition format, to be served by an application metrics endpoint.
+
+    :param collector: :class:`MetricsCollector`
+    :param prefix: `str` metric name prefix
+    :return: `str`
+    """
+    lines = []
+    endpoints = collector.endpoints()
+    counters = (('requests_total', 'requests'), ('errors_total', 'errors'),
+                ('request_bytes_total', 'request_bytes'), ('response_bytes_total', 'response_bytes'))
+    for name, attribute in counters:
+        lines.append('# TYPE {}_{} counter'.format(prefix, name))
+        for metrics in endpoints:
+            lines.append('{}_{}{{method="{}",endpoint="{}"}} {}'.format(
+                prefix, name, metrics.method, _escape_label(metrics.endpoint), getattr(metrics, attribute)))
+    histograms = (('request_seconds', 'latency'), ('serialization_seconds', 'serialization'),
+                  ('network_seconds', 'network'), ('deserialization_seconds', 'deserialization'))
+    for name, attribute in histograms:
+        lines.append('# TYPE {}_{} histogram'.format(prefix, name))
+        for metrics in endpoints:
+            histogram = getattr(metrics, attribute)
+            labels = 'method="{}",endpoint="{}"'.format(metrics.method, _escape_label(metrics.endpoint))
+            total = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                total += count
+                lines.append('{}_{}_bucket{{{},le="{}"}} {}'.format(prefix, name, labels, bound, total))
+            lines.append('{}_{}_sum{{{}}} {}'.format(prefix, name, labels, histogram.sum))
+            lines.append('{}_{}_count{{{}}} {}'.format(prefix, name, labels, histogram.count))
+    return '\n'.join(lines) + '\n'
+
+
+class StatsdExporter(object):
+    """
+    Send request metrics to a StatsD server over UDP as each request completes.
+    Endpoint names are converted to metric name segments, for example v1.series.query.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='atsd_client'):
+        """
+        :param host: `str` StatsD host
+        :param port: `int` StatsD UDP port
+        :param prefix: `str` metric name prefix
+        """
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def attach(self, client):
+        """
+        Register the exporter as after_response and on_error hook of the client.
+
+        :param client: :class:`._client.Client`
+        :return: the exporter
+        """
+        client.add_hook('after_response', self.record)
+        client.add_hook('on_error', self.record)
+        return self
+
+    def detach(self, client):
+        client.remove_hook('after_response', self.record)
+        client.remove_hook('on_error', self.record)
+
+    def record(self, event):
+        """
+        :param event: :class:`RequestEvent`
+        """
+        name = '{}.{}.{}'.format(self.prefix, re.sub(r'[^\w-]+', '.', event.endpoint.replace('{', '').replace('}', '')),
+                                 event.method.lower())
+        lines = ['{}.requests:1|c'.format(name), '{}.time:{:.3f}|ms'.format(name, event.elapsed * 1000)]
+        if event.error is not None:
+            lines.append('{}.errors:1|c'.format(name))
+        if event.request_bytes:
+            lines.append('{}.request_bytes:{}|c'.format(name, event.request_bytes))
+        if event.response_bytes:
+            lines.append('{}.response_bytes:{}|c'.format(name, event.response_bytes))
+        try:
+            self._socket.sendto('\n'.join(lines).encode('utf-8'), self.address)
+        except OSError as e:
+            logging.debug('Failed to send metrics to StatsD at %s:%s: %s', self.address[0], self.address[1], e)
+
+    def close(self):
+        self._socket.close()
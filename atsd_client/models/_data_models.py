@@ -16,11 +16,14 @@ permissions and limitations under the License.
 """
 
 import copy
+import numbers
+from array import array
 
 from ._meta_models import Entity, Metric
 from .._constants import display_series_threshold, display_series_part
 from .._jsonutil import deserialize, serialize
-from .._time_utilities import timediff_in_minutes, to_milliseconds, to_date, to_iso
+from .._time_utilities import timediff_in_minutes, to_milliseconds, to_milliseconds_many, to_date, to_iso, \
+    get_localzone
 from .._utilities import NoneDict
 from ..utils import print_tags
 
@@ -49,12 +52,19 @@ class Sample(object):
     unless the metric is optionally enabled for version tracking.
     """
 
+    __slots__ = ('_v', '_x', '_t', '_d', '_version')
+
     def __init__(self, value, time=None, version=None, x=None):
-        self._v = copy.deepcopy(value) if not value == "Nan" else float("nan")
+        if value == "Nan":
+            value = float("nan")
+        elif value is not None and not isinstance(value, (numbers.Number, str)):
+            value = copy.deepcopy(value)
+        self._v = value
         self._x = x
         #: class:`datetime` object | `long` milliseconds | `str`  ISO 8601 date
         self._t = to_milliseconds(time)
-        self._d = to_date(self._t)
+        # datetime is created on the first get_date() call
+        self._d = None
         # `.dict` version object including 'source' and 'status' keys
         self._version = version
 
@@ -82,6 +92,8 @@ class Sample(object):
         return self._t
 
     def get_date(self):
+        if self._d is None and self._t is not None:
+            self._d = to_date(self._t)
         return self._d
 
     @property
@@ -99,7 +111,7 @@ class Sample(object):
     @t.setter
     def t(self, t):
         self._t = to_milliseconds(t)
-        self._d = to_date(self._t)
+        self._d = None
 
     @version.setter
     def version(self, value):
@@ -127,6 +139,134 @@ class Sample(object):
         return self._compare(other) != 0
 
 
+# ------------------------------------------------------------------------------
+class SampleColumns(object):
+    """
+    Compact columnar storage of series samples.
+    Timestamps are stored in `array('q')` as milliseconds, values in `array('d')` with NaN for missing values,
+    text annotations and versions in sparse dicts keyed by sample index.
+    :class:`.Sample` objects are created on access, changes to them are not stored.
+    """
+
+    __slots__ = ('times', 'values', 'x', 'versions')
+
+    def __init__(self, times=None, values=None, x=None, versions=None):
+        #: `array('q')` sample times in milliseconds
+        self.times = array('q', times if times is not None else [])
+        #: `array('d')` sample values
+        self.values = array('d', values if values is not None else [])
+        if len(self.times) != len(self.values):
+            raise ValueError('times and values must have the same length')
+        #: `dict` of ``index: text value`` pairs
+        self.x = dict(x) if x else {}
+        #: `dict` of ``index: version`` pairs
+        self.versions = dict(versions) if versions else {}
+
+    @staticmethod
+    def from_dicts(data):
+        """
+        :param data: `list` of {'t': time, 'v': value} objects
+        :return: :class:`.SampleColumns`
+        """
+        columns = SampleColumns()
+        values = columns.values
+        times = to_milliseconds_many([data_unit.get('t', data_unit.get('d', None)) for data_unit in data])
+        columns.times.extend(int(round(t)) for t in times)
+        for index, data_unit in enumerate(data):
+            value = data_unit.get('v')
+            values.append(_NAN if value is None else float(value))
+            if data_unit.get('x') is not None:
+                columns.x[index] = data_unit['x']
+            if data_unit.get('version') is not None:
+                columns.versions[index] = data_unit['version']
+        return columns
+
+    def append(self, sample):
+        index = len(self.times)
+        self.times.append(int(round(sample.t)))
+        self.values.append(_NAN if sample.v is None else float(sample.v))
+        if sample.x is not None:
+            self.x[index] = sample.x
+        if sample.version is not None:
+            self.versions[index] = sample.version
+
+    def extend(self, samples):
+        if isinstance(samples, SampleColumns):
+            offset = len(self.times)
+            self.times.extend(samples.times)
+            self.values.extend(samples.values)
+            self.x.update((offset + index, x) for index, x in samples.x.items())
+            self.versions.update((offset + index, version) for index, version in samples.versions.items())
+            return
+        for sample in samples:
+            self.append(sample)
+
+    def sort(self, key=None, reverse=False):
+        if key is None:
+            order = sorted(range(len(self.times)), key=self.times.__getitem__, reverse=reverse)
+        else:
+            order = sorted(range(len(self.times)), key=lambda i: key(self[i]), reverse=reverse)
+        position = dict((index, new_index) for new_index, index in enumerate(order))
+        self.times = array('q', [self.times[i] for i in order])
+        self.values = array('d', [self.values[i] for i in order])
+        self.x = dict((position[i], x) for i, x in self.x.items())
+        self.versions = dict((position[i], version) for i, version in self.versions.items())
+
+    def unique_indexes(self):
+        """
+        :return: `list` of sample indexes ordered by time, keeping the last sample for duplicate timestamps
+        """
+        times = self.times
+        result = []
+        previous = None
+        for index in sorted(range(len(times)), key=times.__getitem__):
+            if result and times[index] == previous:
+                result.pop()
+            result.append(index)
+            previous = times[index]
+        return result
+
+    def to_dict(self):
+        result = []
+        for index in range(len(self.times)):
+            value = self.values[index]
+            d = {'v': value if value == value else None, 't': self.times[index]}
+            if index in self.x:
+                d['x'] = self.x[index]
+            if index in self.versions:
+                d['version'] = self.versions[index]
+            result.append(d)
+        return result
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.times)))]
+        if index < 0:
+            index += len(self.times)
+        if not 0 <= index < len(self.times):
+            raise IndexError('sample index out of range')
+        return Sample(self.values[index], self.times[index], self.versions.get(index), self.x.get(index))
+
+    def __iter__(self):
+        for index in range(len(self.times)):
+            yield self[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<SampleColumns size={}>'.format(len(self.times))
+
+
+_NAN = float('nan')
+
+
 # ------------------------------------------------------------------------------
 class Series(object):
     """
@@ -143,9 +283,11 @@ class Series(object):
         self._metric = metric
         #: `dict` of ``tag_name: tag_value`` pairs
         self._tags = NoneDict(tags)
-        # `list` of :class:`.Sample` objects| `list` of {'t': time, 'v': value} objects
+        # `list` of :class:`.Sample` objects| `list` of {'t': time, 'v': value} objects | :class:`.SampleColumns`
         self._data = []
-        if data is not None:
+        if isinstance(data, SampleColumns):
+            self._data = data
+        elif data is not None:
             for data_unit in data:
                 if isinstance(data_unit, dict):  # Compatibility
                     self._data.append(Sample(
@@ -216,8 +358,39 @@ class Series(object):
         return serialize(self)
 
     @staticmethod
-    def from_dict(s):
-        return deserialize(s, Series)
+    def from_dict(s, columnar=False):
+        """
+        :param s: `dict` series object
+        :param columnar: `bool` store samples in :class:`.SampleColumns` instead of `list` of :class:`.Sample`
+        :return: :class:`.Series`
+        """
+        if not columnar:
+            return deserialize(s, Series)
+        s = dict(s)
+        data = s.pop('data', None)
+        series = deserialize(s, Series)
+        series.data = SampleColumns.from_dicts(data if data is not None else [])
+        return series
+
+    @staticmethod
+    def from_columns(entity, metric, times, values, tags=None, x=None, versions=None):
+        """
+        :param entity: `str` entity name
+        :param metric: `str` metric name
+        :param times: iterable of `int` sample times in milliseconds
+        :param values: iterable of `float` sample values
+        :param tags: `dict` series tags
+        :param x: `dict` of ``index: text value`` pairs
+        :param versions: `dict` of ``index: version`` pairs
+        :return: :class:`.Series` with samples stored in :class:`.SampleColumns`
+        """
+        return Series(entity, metric, data=SampleColumns(times, values, x, versions), tags=tags)
+
+    def is_columnar(self):
+        """
+        :return: True if samples are stored in :class:`.SampleColumns`
+        """
+        return isinstance(self._data, SampleColumns)
 
     def add_samples(self, *samples):
         """
@@ -238,6 +411,9 @@ class Series(object):
         Valid numeric samples in this series
         :return: list of `Number`
         """
+        if self.is_columnar():
+            values = self._data.values
+            return [values[index] for index in self._data.unique_indexes()]
         data = sorted(self._data)
         result = []
         for num, sample in enumerate(data):
@@ -251,6 +427,9 @@ class Series(object):
         Valid timestamps in this series
         :return: list of `str`
         """
+        if self.is_columnar():
+            times = self._data.times
+            return [to_iso(to_date(times[index])) for index in self._data.unique_indexes()]
         data = sorted(self._data)
         result = []
         for num, sample in enumerate(data):
@@ -261,24 +440,75 @@ class Series(object):
         return result
 
     @staticmethod
-    def from_pandas_series(entity, metric, ts):
+    def from_pandas_series(entity, metric, ts, tags=None, columnar=False):
         """
         :param entity: `str` entity name
         :param metric: `str` metric name
-        :param ts: pandas time series object
+        :param ts: pandas time series object. Index without time zone is treated as local time.
+        :param tags: `dict` series tags
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
         :return: :class:`.Series` with data from pandas time series
         """
-        res = Series(entity, metric)
-        for dt in ts.index:
-            res.data.append(Sample(value=ts[dt], time=dt))
-        return res
+        import numpy as np
+        import pandas as pd
+        index = pd.DatetimeIndex(pd.to_datetime(ts.index))
+        if index.tz is None:
+            index = index.tz_localize(get_localzone())
+        utc = index.tz_convert('UTC').tz_localize(None)
+        times = np.asarray((utc - pd.Timestamp(0)) // pd.Timedelta(1, unit='ms'), dtype=np.int64)
+        try:
+            values = np.asarray(ts.values, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = None
+        if columnar and values is not None:
+            return Series.from_columns(entity, metric, times.tobytes(), values.tobytes(), tags=tags)
+        data = [Sample(value=v, time=t) for t, v in zip(times.tolist(), ts.tolist())]
+        return Series(entity, metric, data=data, tags=tags)
 
     def to_pandas_series(self):
         """
-        :return: pandas time series object
+        :return: pandas time series object indexed by local time, duplicate timestamps are removed
+        """
+        import numpy as np
+        import pandas as pd
+        if self.is_columnar():
+            times = np.frombuffer(self._data.times, dtype=np.int64)
+            values = np.frombuffer(self._data.values, dtype=np.float64)
+        else:
+            # sample times can have a fraction of millisecond, round them as SampleColumns does
+            times = np.rint(np.fromiter((sample.t for sample in self._data), dtype=np.float64,
+                                        count=len(self._data))).astype(np.int64)
+            raw_values = [sample.v for sample in self._data]
+            try:
+                values = np.asarray(raw_values, dtype=np.float64)
+            except (TypeError, ValueError):
+                values = np.asarray(raw_values, dtype=object)
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        last = np.append(times[1:] != times[:-1], True) if len(times) > 0 else np.zeros(0, dtype=bool)
+        index = pd.to_datetime(times[last], unit='ms', utc=True).tz_convert(get_localzone())
+        return pd.Series(values[last], index=index)
+
+    @staticmethod
+    def to_pandas_dataframe(series_list, columns=None):
+        """
+        :param series_list: `list` of :class:`.Series`
+        :param columns: `list` of column names. Default: entity/metric followed by series tags
+        :return: pandas DataFrame with one column per series, indexed by the union of series timestamps
         """
         import pandas as pd
-        return pd.Series(self.values(), index=self.times())
+        if columns is None:
+            columns = []
+            for series in series_list:
+                name = '{}/{}'.format(series.entity, series.metric)
+                if series.tags:
+                    name += '/' + print_tags(series.tags)
+                columns.append(name)
+        if len(columns) != len(series_list):
+            raise ValueError('Number of columns must be equal to number of series')
+        if len(series_list) == 0:
+            return pd.DataFrame()
+        return pd.concat([series.to_pandas_series() for series in series_list], axis=1, keys=columns)
 
     def plot(self):
         """
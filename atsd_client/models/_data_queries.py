@@ -264,6 +264,79 @@ class SeriesDeleteQuery:
         self.exactMatch = value
 
 
+# ------------------------------------------------------------------------------
+class SeriesUrlQuery:
+    """
+    Class representing a series query sent with GET method, with filters specified in the URL.
+    Docs: https://axibase.com/docs/atsd/api/data/series/url-query.html
+    """
+
+    def __init__(self, entity, metric, format="json", start_date=None, end_date=None, interval=None, tags=None,
+                 limit=None, params=None):
+        if not metric:
+            raise ValueError("Metric is required.")
+        if not entity:
+            raise ValueError("Entity is required.")
+        if format not in ("json", "csv"):
+            raise ValueError("Format must be json or csv, found: " + unicode(format))
+        #: `str` entity name
+        self.entity = entity
+        #: `str` metric name
+        self.metric = metric
+        #: `str` response format: json or csv. Default: json
+        self.format = format
+        #: `str` ISO 8601 date or calendar keyword. Start of the selection interval
+        self.startDate = to_iso(start_date)
+        #: `str` ISO 8601 date or calendar keyword. End of the selection interval
+        self.endDate = to_iso(end_date)
+        #: `dict` duration of the selection interval, for example {"count": 1, "unit": "DAY"}
+        self.interval = interval
+        #: `dict` of ``tag_name: tag_value`` pairs
+        self.tags = tags
+        #: `int` maximum number of samples returned for each series
+        self.limit = limit
+        #: `dict` other request parameters, for example {"aggregate": "AVG", "period": "1-HOUR"}
+        self.params = params
+
+    def set_start_date(self, value):
+        self.startDate = to_iso(value)
+
+    def set_end_date(self, value):
+        self.endDate = to_iso(value)
+
+    def set_interval(self, value):
+        self.interval = value
+
+    def set_tags(self, value):
+        self.tags = value
+
+    def set_limit(self, value):
+        self.limit = value
+
+    def set_params(self, value):
+        self.params = value
+
+    def to_params(self):
+        """
+        :return: `dict` of request parameters
+        """
+        params = {}
+        if self.startDate is not None:
+            params["startDate"] = self.startDate
+        if self.endDate is not None:
+            params["endDate"] = self.endDate
+        if self.interval is not None:
+            params["interval"] = "{}-{}".format(self.interval["count"], self.interval["unit"])
+        if self.limit is not None:
+            params["limit"] = self.limit
+        if self.tags:
+            for name, value in self.tags.items():
+                params["tags." + name] = value
+        if self.params:
+            params.update(self.params)
+        return params
+
+
 # ------------------------------------------------------------------------------
 class SeriesFilter:
     def __init__(self, metric, tags=None, type="HISTORY", tag_expression=None, exact_match=None):
@@ -800,3 +873,56 @@ class MessageQuery:
 
     def set_expression(self, value):
         self.expression = value
+
+
+# ------------------------------------------------------------------------------
+class MessageStatisticsQuery:
+    """
+    Class to count message records matching the specified filters, grouped by period and optionally by message tags.
+    """
+
+    def __init__(self, entity_filter, date_filter, type=None, source=None, tags=None, severity=None, severities=None,
+                 min_severity=None, group_keys=None, aggregate=None):
+        copy_not_empty_attrs(entity_filter, self)
+        copy_not_empty_attrs(date_filter, self)
+        self.type = type
+        self.source = source
+        self.tags = tags
+        self.severity = severity
+        self.severities = severities
+        self.minSeverity = min_severity
+        #: `list` of message tag names to group counts by
+        self.groupKeys = group_keys
+        #: :class:`.Aggregate` with COUNT type and period, for example Aggregate(period={'count': 1, 'unit': 'HOUR'},
+        # types=[AggregateType.COUNT]). Default: total count for the selection interval
+        self.aggregate = aggregate
+
+    def set_entity_filter(self, value):
+        copy_not_empty_attrs(value, self)
+
+    def set_date_filter(self, value):
+        copy_not_empty_attrs(value, self)
+
+    def set_type(self, value):
+        self.type = value
+
+    def set_source(self, value):
+        self.source = value
+
+    def set_tags(self, value):
+        self.tags = value
+
+    def set_severity(self, value):
+        self.severity = value
+
+    def set_severities(self, value):
+        self.severities = value
+
+    def set_min_severity(self, value):
+        self.minSeverity = value
+
+    def set_group_keys(self, value):
+        self.groupKeys = value
+
+    def set_aggregate(self, value):
+        self.aggregate = value
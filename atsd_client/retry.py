@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError
+
+from ._constants import sql_query_url
+
+_idempotent_methods = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+def is_idempotent(method, path):
+    """
+    :param method: `str` HTTP method
+    :param path: `str` API path, for example v1/series/query
+    :return: True if repeating the request does not change the result: queries, GET, PUT and DELETE requests
+    """
+    if method in _idempotent_methods:
+        return True
+    path = path.split('?', 1)[0].rstrip('/')
+    return method == 'POST' and (path.endswith('/query') or path == sql_query_url)
+
+
+class RetryPolicy(object):
+    """
+    Policy for retrying requests which failed because of connection errors or transient server errors.
+    Queries, GET, PUT and DELETE requests are retried. Inserts and other POST and PATCH requests are retried
+    only if retry_inserts is enabled, because a request which reached the server could be executed twice.
+    The delay before each retry grows exponentially from backoff_base up to backoff_cap seconds,
+    with random jitter, unless the server specifies Retry-After.
+    """
+
+    #: exceptions raised by connection errors which can be retried
+    retryable_exceptions = (ConnectionError, Timeout, ChunkedEncodingError)
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=30.0, jitter=True,
+                 retry_statuses=(429, 502, 503, 504), retry_inserts=False, respect_retry_after=True):
+        """
+        :param max_attempts: `int` maximum number of attempts including the first one. Default: 3
+        :param backoff_base: `float` delay in seconds before the first retry. Default: 0.5
+        :param backoff_cap: `float` maximum delay in seconds. Default: 30
+        :param jitter: `bool` randomize delays between 0 and the exponential delay. Default: True
+        :param retry_statuses: HTTP status codes which are retried. Default: 429, 502, 503, 504
+        :param retry_inserts: `bool` retry inserts and other non-idempotent requests. Default: False
+        :param respect_retry_after: `bool` wait for the time specified in Retry-After response header,
+        limited by backoff_cap. Default: True
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_cap = float(backoff_cap)
+        self.jitter = jitter
+        self.retry_statuses = frozenset(int(status) for status in retry_statuses)
+        self.retry_inserts = retry_inserts
+        self.respect_retry_after = respect_retry_after
+        #: `int` number of retried attempts
+        self.retries = 0
+        #: `int` number of requests which succeeded after retrying
+        self.recovered = 0
+        #: `int` number of requests which failed after all attempts
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def is_idempotent(self, method, path):
+        """
+        :param method: `str` HTTP method
+        :param path: `str` API path, for example v1/series/query
+        :return: True if repeating the request does not change the result
+        """
+        return is_idempotent(method, path)
+
+    def allows(self, method, path, attempt):
+        """
+        :param attempt: `int` number of the failed attempt starting from 1
+        :return: True if the request can be retried
+        """
+        return attempt < self.max_attempts and (self.retry_inserts or self.is_idempotent(method, path))
+
+    def delay(self, attempt, retry_after=None):
+        """
+        :param attempt: `int` number of the failed attempt starting from 1
+        :param retry_after: `str` value of Retry-After response header
+        :return: `float` seconds to wait before the next attempt
+        """
+        if retry_after is not None and self.respect_retry_after:
+            seconds = _parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(self.backoff_cap, seconds)
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def wait(self, attempt, retry_after=None):
+        """Count the retry and sleep before the next attempt"""
+        with self._lock:
+            self.retries += 1
+        time.sleep(self.delay(attempt, retry_after))
+
+    def record(self, attempts, success):
+        """Count the result of a request after the last attempt"""
+        with self._lock:
+            if success and attempts > 1:
+                self.recovered += 1
+            elif not success and attempts > 1:
+                self.exhausted += 1
+
+    def stats(self):
+        """
+        :return: `dict` with retry counters
+        """
+        return {'retries': self.retries, 'recovered': self.recovered, 'exhausted': self.exhausted}
+
+
+def _parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - time.time())
@@ -15,7 +15,16 @@ express or implied. See the License for the specific language governing
 permissions and limitations under the License.
 """
 
-from . import _jsonutil
+import copy
+import gzip
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import _jsonutil, _jsonstream
+from ._batching import split_series, send_batches, csv_lines, split_csv
+from ._fanout import partition, run_partitions, ParallelQueryResult
+from ._planner import aggregate_period, copy_query, query_field, query_range, split_range, stitch_series, \
+    window_milliseconds, window_queries
 from ._client import Client
 from ._constants import *
 from ._time_utilities import to_iso, to_date
@@ -32,6 +41,25 @@ def _check_name(name):
         raise ValueError('name is empty')
 
 
+def _raw_queries(queries):
+    """
+    Copy series queries requesting sample times in milliseconds instead of ISO strings.
+
+    :param queries: :class:`.SeriesQuery` | `dict` objects
+    :return: `list` of copied queries
+    """
+    result = []
+    for query in queries:
+        if isinstance(query, dict):
+            query = dict(query)
+            query['timeFormat'] = 'milliseconds'
+        else:
+            query = copy.copy(query)
+            query.timeFormat = 'milliseconds'
+        result.append(query)
+    return result
+
+
 class _Service(object):
     def __init__(self, conn):
         if not isinstance(conn, Client):
@@ -39,40 +67,286 @@ class _Service(object):
         self.conn = conn
 
 
+class _MetadataService(_Service):
+    def __init__(self, conn, cache=None):
+        """
+        :param conn: :class:`.Client`
+        :param cache: :class:`.MetadataCache` for objects returned by get method. Default: None - no caching
+        """
+        super(_MetadataService, self).__init__(conn)
+        self.cache = cache
+
+    def _cached(self, kind, name, load):
+        if self.cache is None:
+            return load(name)
+        return self.cache.get((kind, name.lower()), lambda: load(name))
+
+    def _invalidate(self, kind, name):
+        if self.cache is not None:
+            self.cache.invalidate((kind, name.lower()))
+
+
 # ------------------------------------------------------------------------ SERIES
 class SeriesService(_Service):
-    def insert(self, *series_objects):
-        """Insert an array of samples for a given series identified by metric, entity, and series tags
+    def __init__(self, conn, cache=None):
+        """
+        :param conn: :class:`.Client`
+        :param cache: :class:`.SeriesCache` used by query methods. Default: None - no caching
+        """
+        super(SeriesService, self).__init__(conn)
+        self.cache = cache
+
+    def insert(self, *series_objects, batch_size=None, batch_bytes=None, max_workers=1):
+        """Insert an array of samples for a given series identified by metric, entity, and series tags.
+        If batch_size or batch_bytes is specified, samples are split into multiple requests.
 
         :param series_objects: :class:`.Series` objects
-        :return: True if success
+        :param batch_size: `int` maximum number of samples per request
+        :param batch_bytes: `int` maximum size of request payload in bytes
+        :param max_workers: `int` number of requests sent concurrently. Default: 1
+        :return: True if success | :class:`.BatchInsertResult` if batching is enabled
         """
         for series in series_objects:
             if len(series.data) == 0:
                 raise DataParseException('data', Series, 'Inserting empty series')
-        self.conn.post(series_insert_url, series_objects)
-        return True
+        if batch_size is None and batch_bytes is None:
+            self.conn.post(series_insert_url, series_objects)
+            return True
+        batches = split_series(series_objects, batch_size, batch_bytes)
+        return send_batches(lambda batch: self.conn.post(series_insert_url, batch), batches, max_workers)
 
-    def query(self, *queries):
+    def query(self, *queries, columnar=False, raw=False):
         """Retrieve series for each query
 
         :param queries: :class:`.SeriesQuery` objects
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :param raw: `bool` request sample times in milliseconds instead of ISO format, overriding time_format
+        of the queries. Sample.t remains an `int` and dates are created only on get_date() calls. Default: False
         :return: list of :class:`.Series` objects
         """
+        if self.cache is None:
+            return self._query(queries, columnar, raw)
+        result = []
+        for query in queries:
+            result.extend(self._query_cached(query, columnar, raw))
+        return result
+
+    def _query(self, queries, columnar, raw):
+        if raw:
+            queries = _raw_queries(queries)
         response = self.conn.post(series_query_url, queries)
-        return [_jsonutil.deserialize(element, Series) for element in response]
-
-    def url_query(self, *queries):
+        return [Series.from_dict(element, columnar) for element in response]
+
+    def _query_cached(self, query, columnar, raw):
+        series_list = self.cache.get(query, lambda window_query: self.conn.post(series_query_url,
+                                                                                _raw_queries([window_query])),
+                                     columnar)
+        if series_list is None:
+            return self._query([query], columnar, raw)
+        return series_list
+
+    def query_parallel(self, queries, max_workers=4, queries_per_request=1, columnar=False, raw=False):
+        """Retrieve series for each query, splitting queries into multiple requests executed concurrently
+        so that a slow query does not delay the others.
+
+        :param queries: `list` of :class:`.SeriesQuery` objects
+        :param max_workers: `int` number of concurrent requests, should not exceed pool_maxsize of the client.
+        Default: 4
+        :param queries_per_request: `int` number of queries sent in one request. Default: 1
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :param raw: `bool` request sample times in milliseconds instead of ISO format. Default: False
+        :return: :class:`.ParallelQueryResult` list of :class:`.Series` objects in the order of queries,
+        with request latency of each partition
         """
-        Unimplemented
+        return run_partitions(lambda part: self.query(*part, columnar=columnar, raw=raw),
+                              partition(list(queries), queries_per_request), max_workers)
+
+    def query_split(self, query, window=None, target_samples=None, max_workers=4, columnar=False, raw=False):
+        """Retrieve series for a query with a long selection interval by splitting the interval into windows
+        queried concurrently. Samples of series returned for each window are merged in time order.
+        Window duration is either fixed or estimated from the number of samples in the interval
+        so that each window contains about target_samples samples.
+        Queries with limit are not supported. For aggregated queries the window must be a multiple of the period,
+        and the window estimated from target_samples is rounded up to a multiple of the period.
+        Aggregated queries must align periods to START_TIME or END_TIME. Window boundaries are counted from startDate,
+        or from endDate if the period is aligned to END_TIME, so that no period is split between windows.
+
+        :param query: :class:`.SeriesQuery` with startDate and endDate, or one of them and interval
+        :param window: `int` milliseconds | :class:`datetime.timedelta` | `dict` interval, for example
+        {'count': 30, 'unit': 'DAY'}
+        :param target_samples: `int` number of samples per window, used if window is not specified
+        :param max_workers: `int` number of concurrent requests. Default: 4
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :param raw: `bool` request sample times in milliseconds instead of ISO format. Default: False
+        :return: :class:`.ParallelQueryResult` list of :class:`.Series` objects with statistics for each window
         """
-        raise NotImplementedError
+        queries = self._plan_windows(query, window, target_samples)
+        result = run_partitions(lambda part: self.query(*part, columnar=columnar, raw=raw), partition(queries),
+                                max_workers)
+        stitched = ParallelQueryResult(result.partitions)
+        stitched.extend(stitch_series(result))
+        stitched.elapsed = result.elapsed
+        return stitched
+
+    def iter_query_split(self, query, window=None, target_samples=None, max_workers=1, columnar=False, raw=False):
+        """Retrieve series for a query with a long selection interval window by window.
+        Series returned for each window are yielded in window order before the next windows are processed,
+        so the same series is yielded once per window with its samples in that window.
+
+        :param query: :class:`.SeriesQuery` with startDate and endDate, or one of them and interval
+        :param window: `int` milliseconds | :class:`datetime.timedelta` | `dict` interval
+        :param target_samples: `int` number of samples per window, used if window is not specified
+        :param max_workers: `int` number of windows requested ahead concurrently. Default: 1
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :param raw: `bool` request sample times in milliseconds instead of ISO format. Default: False
+        :return: generator of :class:`.Series` objects
+        """
+        queries = self._plan_windows(query, window, target_samples)
+        max_workers = max(1, max_workers or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            try:
+                for window_query in queries:
+                    pending.append(executor.submit(self.query, window_query, columnar=columnar, raw=raw))
+                    if len(pending) >= max_workers:
+                        for series in pending.popleft().result():
+                            yield series
+                while pending:
+                    for series in pending.popleft().result():
+                        yield series
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _plan_windows(self, query, window, target_samples):
+        if query_field(query, 'limit'):
+            raise ValueError('Queries with limit cannot be split')
+        start, end = query_range(query)
+        period = aggregate_period(query)
+        if period is not None and period[1] not in ('START_TIME', 'END_TIME'):
+            # calendar periods, the default alignment, may be split between windows
+            raise ValueError('Aggregation period must be aligned to START_TIME or END_TIME to split the query, '
+                             'found: {}'.format(period[1] or 'CALENDAR'))
+        if window is not None:
+            window = window_milliseconds(window)
+            if period is not None and window % period[0] != 0:
+                raise ValueError('Window of aggregated query must be a multiple of the period, found: window={} ms, '
+                                 'period={} ms'.format(window, period[0]))
+        elif target_samples is not None:
+            count = self._count_samples(query, start, end, period)
+            windows = max(1, -(-count // int(target_samples)))
+            window = max(1, -(-(end - start) // windows))
+            if period is not None:
+                window = -(-window // period[0]) * period[0]
+        else:
+            raise ValueError('Either window or target_samples must be specified')
+        origin = end if period is not None and period[1] == 'END_TIME' else start
+        return window_queries(query, split_range(start, end, window, origin))
+
+    def _count_samples(self, query, start, end, period):
+        probe = copy_query(query, startDate=to_iso(to_date(start)), endDate=to_iso(to_date(end)), interval=None,
+                           aggregate={'types': ['COUNT'], 'period': {'count': end - start, 'unit': 'MILLISECOND',
+                                                                     'align': 'START_TIME'}},
+                           timeFormat='milliseconds')
+        counts = [sum(value for value in series.values() if value == value)
+                  for series in self._query([probe], False, False)]
+        if period is None:
+            return int(sum(counts))
+        # aggregated series have one sample per period for each aggregation type
+        aggregate = query_field(query, 'aggregate')
+        types = query_field(aggregate, 'types') or [query_field(aggregate, 'type')]
+        return len([count for count in counts if count > 0]) * -(-(end - start) // period[0]) * len(types)
+
+    def iter_query(self, *queries, chunk_size=None, columnar=False, raw=False):
+        """Retrieve series for each query, decoding the response incrementally as it arrives.
+        Memory usage is limited by the largest series, or by chunk_size samples if specified.
 
-    def csv_insert(self, *csvs):
+        :param queries: :class:`.SeriesQuery` objects
+        :param chunk_size: `int` maximum number of samples in yielded series. Series with more samples are yielded
+        as multiple :class:`.Series` objects with the same entity, metric and tags. Default: None - no limit
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :param raw: `bool` request sample times in milliseconds instead of ISO format. Default: False
+        :return: generator of :class:`.Series` objects
+        """
+        if raw:
+            queries = _raw_queries(queries)
+        response = self.conn.post_stream(series_query_url, queries)
+        try:
+            for element in _jsonstream.iter_array(response.iter_content(stream_chunk_bytes), chunk_size,
+                                                  response.encoding or 'utf-8', self.conn.json_codec.loads):
+                yield Series.from_dict(element, columnar)
+        finally:
+            response.close()
+
+    def url_query(self, *queries, max_workers=1, files=None, columnar=False):
+        """Retrieve series for each query with GET requests, which can be cached by HTTP proxies.
+        Requests are executed concurrently if max_workers is greater than 1.
+
+        :param queries: :class:`.SeriesUrlQuery` objects
+        :param max_workers: `int` number of concurrent requests. Default: 1
+        :param files: `list` of `str` file paths or binary file objects, one for each query, to which CSV responses
+        are written as they arrive. Default: None - CSV responses are returned as `str`
+        :param columnar: `bool` store samples in compact :class:`.SampleColumns`. Default: False
+        :return: :class:`.ParallelQueryResult` list of :class:`.Series` objects for json queries, and CSV `str`
+        or the file for csv queries, in the order of queries
         """
-        Unimplemented
+        if files is not None and len(files) != len(queries):
+            raise ValueError('Number of files must be equal to the number of queries')
+        targets = list(zip(queries, files if files is not None else [None] * len(queries)))
+        return run_partitions(lambda part: self._url_query(part[0][0], part[0][1], columnar), partition(targets),
+                              max_workers)
+
+    def _url_query(self, query, file, columnar):
+        url = series_url_query_url.format(format=query.format, entity=quote(query.entity, ''),
+                                          metric=quote(query.metric, ''))
+        if query.format == 'json':
+            return [Series.from_dict(element, columnar) for element in self.conn.get(url, query.to_params())]
+        response = self.conn.get_stream(url, query.to_params())
+        try:
+            if file is None:
+                return [response.text]
+            if isinstance(file, str):
+                with open(file, 'wb') as f:
+                    for chunk in response.iter_content(stream_chunk_bytes):
+                        f.write(chunk)
+            else:
+                for chunk in response.iter_content(stream_chunk_bytes):
+                    file.write(chunk)
+        finally:
+            response.close()
+        return [file]
+
+    def csv_insert(self, entity, csv_data, tags=None, chunk_size=10000, chunk_bytes=None, compress=False,
+                   progress=None):
+        """Insert series for the entity from CSV with time in the first column and metric values in other columns.
+        Rows are read and sent in chunks, each chunk starts with the header row.
+
+        :param entity: `str` entity name
+        :param csv_data: `str` file path | file object | iterable of `str` lines or of sequences of values.
+        The first row is the header, for example: time,cpu_busy,cpu_idle
+        :param tags: `dict` of series tags applied to all series
+        :param chunk_size: `int` maximum number of rows per request. Default: 10000
+        :param chunk_bytes: `int` maximum size of request payload in bytes before compression. Default: None - no limit
+        :param compress: `bool` compress requests with gzip. Default: False
+        :param progress: function called after each request with the number of rows and bytes sent so far
+        :return: `int` number of inserted rows
         """
-        raise NotImplementedError
+        _check_name(entity)
+        url = series_csv_insert_url.format(entity=quote(entity, ''))
+        headers = {'Content-Type': 'text/csv; charset=utf-8'}
+        if compress:
+            headers['Content-Encoding'] = 'gzip'
+        rows, sent_bytes = 0, 0
+        for chunk, count in split_csv(csv_lines(csv_data), chunk_size, chunk_bytes):
+            body = chunk.encode('utf-8')
+            if compress:
+                body = gzip.compress(body)
+            self.conn.post_plain_text(url, body, params=dict(tags) if tags else None, headers=headers)
+            rows += count
+            sent_bytes += len(body)
+            if progress is not None:
+                progress(rows, sent_bytes)
+        return rows
 
     def delete(self, *delete_query):
         """Delete series matching delete_query tuple
@@ -223,11 +497,14 @@ class MessageService(_Service):
         reserved = {'type', 'entity', 'tags', 'source', 'date', 'message', 'severity'}
         return response_to_dataframe(resp, reserved, **frame_params)
 
-    def statistics(self, *params):
-        """
-        Unimplemented
+    def statistics(self, *queries):
+        """Count messages matching each query without retrieving them
+
+        :param queries: :class:`.MessageStatisticsQuery`
+        :return: `list` of :class:`.Series` objects with message counts for each period
         """
-        raise NotImplementedError
+        resp = self.conn.post(messages_statistics_url, queries)
+        return [Series.from_dict(element) for element in resp]
 
 
 # ===============================================================================
@@ -235,7 +512,7 @@ class MessageService(_Service):
 # ===============================================================================
 
 # ----------------------------------------------------------------------- METRICS
-class MetricsService(_Service):
+class MetricsService(_MetadataService):
     def get(self, name):
         """Retrieve metric.
 
@@ -243,6 +520,9 @@ class MetricsService(_Service):
         :return: :class:`.Metric`
         """
         _check_name(name)
+        return self._cached('metric', name, self._get)
+
+    def _get(self, name):
         try:
             response = self.conn.get(metric_get_url.format(metric=quote(name, '')))
         except ServerException as e:
@@ -283,6 +563,7 @@ class MetricsService(_Service):
         :return: True if success
         """
         self.conn.patch(metric_update_url.format(metric=quote(metric.name, '')), metric)
+        self._invalidate('metric', metric.name)
         return True
 
     def create_or_replace(self, metric):
@@ -292,6 +573,7 @@ class MetricsService(_Service):
         :return: True if success
         """
         self.conn.put(metric_create_or_replace_url.format(metric=quote(metric.name, '')), metric)
+        self._invalidate('metric', metric.name)
         return True
 
     def delete(self, metric_name):
@@ -301,6 +583,7 @@ class MetricsService(_Service):
         :return: True if success
         """
         self.conn.delete(metric_delete_url.format(metric=quote(metric_name, '')))
+        self._invalidate('metric', metric_name)
         return True
 
     def series(self, metric, entity=None, tags=None, min_insert_date=None, max_insert_date=None):
@@ -340,7 +623,7 @@ class MetricsService(_Service):
 
 
 # ---------------------------------------------------------------------- ENTITIES
-class EntitiesService(_Service):
+class EntitiesService(_MetadataService):
     def get(self, entity_name):
         """Retrieve the entity
 
@@ -348,6 +631,9 @@ class EntitiesService(_Service):
         :return: :class:`.Entity`
         """
         _check_name(entity_name)
+        return self._cached('entity', entity_name, self._get)
+
+    def _get(self, entity_name):
         try:
             response = self.conn.get(ent_get_url.format(entity=quote(entity_name, '')))
         except ServerException as e:
@@ -416,6 +702,7 @@ class EntitiesService(_Service):
         :return: True if success
         """
         self.conn.patch(ent_update_url.format(entity=quote(entity.name, '')), entity)
+        self._invalidate('entity', entity.name)
         return True
 
     def create_or_replace(self, entity):
@@ -425,6 +712,7 @@ class EntitiesService(_Service):
         :return: True if success
         """
         self.conn.put(ent_create_or_replace_url.format(entity=quote(entity.name, '')), entity)
+        self._invalidate('entity', entity.name)
         return True
 
     def delete(self, entity):
@@ -435,6 +723,7 @@ class EntitiesService(_Service):
         """
         entity_name = entity.name if isinstance(entity, Entity) else entity
         self.conn.delete(ent_delete_url.format(entity=quote(entity_name, '')))
+        self._invalidate('entity', entity_name)
         return True
 
     def metrics(self, entity, expression=None, min_insert_date=None, max_insert_date=None, use_entity_insert_time=False,
@@ -469,7 +758,7 @@ class EntitiesService(_Service):
 
 
 # ----------------------------------------------------------------- ENTITY GROUPS
-class EntityGroupsService(_Service):
+class EntityGroupsService(_MetadataService):
     def get(self, group_name):
         """Retrieve the specified entity group.
 
@@ -477,6 +766,9 @@ class EntityGroupsService(_Service):
         :return: :class:`.EntityGroup`
         """
         _check_name(group_name)
+        return self._cached('entity_group', group_name, self._get)
+
+    def _get(self, group_name):
         try:
             resp = self.conn.get(eg_get_url.format(group=quote(group_name, '')))
         except ServerException as e:
@@ -512,6 +804,7 @@ class EntityGroupsService(_Service):
         :return: True if success
         """
         self.conn.patch(eg_update_url.format(group=quote(group.name, '')), group)
+        self._invalidate('entity_group', group.name)
         return True
 
     def create_or_replace(self, group):
@@ -521,6 +814,7 @@ class EntityGroupsService(_Service):
         :return: True if successful
         """
         self.conn.put(eg_create_or_replace_url.format(group=quote(group.name, '')), group)
+        self._invalidate('entity_group', group.name)
         return True
 
     def delete(self, group):
@@ -532,6 +826,7 @@ class EntityGroupsService(_Service):
         """
         group_name = group.name if isinstance(group, EntityGroup) else group
         self.conn.delete(eg_delete_url.format(group=quote(group_name, '')))
+        self._invalidate('entity_group', group_name)
         return True
 
     def get_entities(self, group_name, expression=None, min_insert_date=None, max_insert_date=None, tags=None,
@@ -698,20 +993,22 @@ class PortalsService(_Service):
         and are accessible using the ${parameter_name} syntax.
         :return: PNG file
         """
-        query_params = locals()
-        del query_params['portal_file']
-        del query_params['kwargs']
-        if id is None and name is None:
-            raise ValueError("Either id or name parameter must be specified.")
+        query_params = _portal_params(id, name, entity, width, height, theme, kwargs)
+        self.conn.get(portal_export, query_params, portal=True, portal_file=portal_file)
 
-        possible_themes = ["default", "black"]
-        if theme is not None:
-            if theme.lower() not in possible_themes:
-                raise ValueError("Unsupported theme, use one of: {}".format(", ".join(possible_themes)))
 
-        if len(kwargs) > 0:
-            query_params.update(kwargs)
-        self.conn.get(portal_export, query_params, portal=True, portal_file=portal_file)
+def _portal_params(id, name, entity, width, height, theme, kwargs):
+    if id is None and name is None:
+        raise ValueError("Either id or name parameter must be specified.")
+
+    possible_themes = ["default", "black"]
+    if theme is not None:
+        if theme.lower() not in possible_themes:
+            raise ValueError("Unsupported theme, use one of: {}".format(", ".join(possible_themes)))
+
+    query_params = {'id': id, 'name': name, 'entity': entity, 'width': width, 'height': height, 'theme': theme}
+    query_params.update(kwargs)
+    return dict((key, value) for key, value in query_params.items() if value is not None)
 
 
 def response_to_dataframe(resp, reserved, **frame_params):
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright 2018 Axibase Corporation or its affiliates. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License").
+You may not use this file except in compliance with the License.
+A copy of the License is located at
+
+https://www.axibase.com/atsd/axibase-apache-2.0.pdf
+
+or in the "license" file accompanying this file. This file is distributed
+on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+express or implied. See the License for the specific language governing
+permissions and limitations under the License.
+"""
+
+import logging
+import threading
+import time
+
+from ._constants import properties_insert_url, messages_insert_url
+from .exceptions import DataParseException
+from .models import Series, Property, Message
+from .services import SeriesService
+
+
+class OverflowPolicy(object):
+    #: wait until buffered records are sent
+    BLOCK = 'BLOCK'
+    #: discard new records
+    DROP = 'DROP'
+
+
+class BufferedWriter(object):
+    """
+    Thread-safe writer which accumulates series, properties and messages in memory and inserts them
+    in a background thread when the number of buffered records reaches max_batch_size
+    or the oldest buffered record is older than flush_interval seconds.
+    Series with the same entity, metric and tags are merged into one series.
+    """
+
+    def __init__(self, conn, max_batch_size=1000, flush_interval=1.0, max_buffer_size=100000,
+                 overflow_policy=OverflowPolicy.BLOCK, on_error=None):
+        """
+        :param conn: :class:`.Client`
+        :param max_batch_size: `int` number of samples, properties or messages sent in one request. Default: 1000
+        :param flush_interval: `float` maximum time in seconds records are kept in the buffer. Default: 1
+        :param max_buffer_size: `int` maximum number of samples, properties and messages buffered or being sent.
+        Default: 100000
+        :param overflow_policy: :class:`.OverflowPolicy` action when the buffer is full. Default: BLOCK
+        :param on_error: function called with the exception and the `list` of records which could not be sent
+        (series rejected by the server are passed serialized). Exceptions raised by the function are logged.
+        Default: log error
+        """
+        if overflow_policy not in (OverflowPolicy.BLOCK, OverflowPolicy.DROP):
+            raise ValueError('Invalid overflow policy: ' + str(overflow_policy))
+        self.series_service = SeriesService(conn)
+        self.conn = conn
+        self.max_batch_size = int(max_batch_size)
+        self.flush_interval = float(flush_interval)
+        self.max_buffer_size = int(max_buffer_size)
+        self.overflow_policy = overflow_policy
+        self.on_error = on_error
+        #: `int` number of records discarded because the buffer is full
+        self.dropped = 0
+        #: `int` number of samples, properties and messages sent
+        self.sent = 0
+        #: `int` number of failed requests
+        self.errors = 0
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._series = {}
+        self._properties = []
+        self._messages = []
+        self._buffered = 0
+        self._pending = 0
+        self._oldest = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='atsd-buffered-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def insert(self, *records, timeout=None):
+        """Add records to the buffer
+
+        :param records: :class:`.Series` | :class:`.Property` | :class:`.Message` objects
+        :param timeout: `float` maximum time in seconds to wait for free space if overflow policy is BLOCK.
+        Default: None - wait indefinitely
+        :return: True if records are buffered, False if records are dropped
+        """
+        size = 0
+        for record in records:
+            if isinstance(record, Series):
+                if len(record.data) == 0:
+                    raise DataParseException('data', Series, 'Inserting empty series')
+                size += len(record.data)
+            elif isinstance(record, (Property, Message)):
+                size += 1
+            else:
+                raise ValueError('Unsupported record type: ' + str(type(record)))
+        with self._condition:
+            if self._closed:
+                raise ValueError('Writer is closed')
+            if self._pending > 0 and self._pending + size > self.max_buffer_size:
+                if self.overflow_policy == OverflowPolicy.DROP:
+                    self.dropped += len(records)
+                    return False
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._pending > 0 and self._pending + size > self.max_buffer_size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.dropped += len(records)
+                        return False
+                    self._condition.wait(remaining)
+                    if self._closed:
+                        raise ValueError('Writer is closed')
+            for record in records:
+                if isinstance(record, Series):
+                    key = (record.entity, record.metric, tuple(sorted(record.tags.items())))
+                    buffered = self._series.get(key)
+                    if buffered is None:
+                        self._series[key] = Series(record.entity, record.metric, data=list(record.data),
+                                                   tags=dict(record.tags))
+                    else:
+                        buffered.add_samples(*record.data)
+                elif isinstance(record, Property):
+                    self._properties.append(record)
+                else:
+                    self._messages.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._buffered += size
+            self._pending += size
+            if self._buffered >= self.max_batch_size:
+                self._condition.notify_all()
+        return True
+
+    def flush(self):
+        """Send all buffered records and wait until requests are completed"""
+        with self._send_lock:
+            self._send(self._take())
+
+    def close(self):
+        """Send all buffered records and stop the background thread"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._buffered >= self.max_batch_size:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                    else:
+                        remaining = None
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logging.exception('Failed to flush buffered records')
+
+    def _take(self):
+        with self._condition:
+            taken = list(self._series.values()), self._properties, self._messages, self._buffered
+            self._series, self._properties, self._messages = {}, [], []
+            self._buffered = 0
+            self._oldest = None
+        return taken
+
+    def _send(self, taken):
+        series, properties, messages, size = taken
+        try:
+            if series:
+                try:
+                    result = self.series_service.insert(*series, batch_size=self.max_batch_size)
+                except Exception as e:
+                    self._error(e, series)
+                else:
+                    self.sent += result.samples - result.failed_samples
+                    for failure in result.failures:
+                        self._error(failure.exception, failure.batch)
+            for url, records in ((properties_insert_url, properties), (messages_insert_url, messages)):
+                for i in range(0, len(records), self.max_batch_size):
+                    batch = records[i:i + self.max_batch_size]
+                    try:
+                        self.conn.post(url, batch)
+                        self.sent += len(batch)
+                    except Exception as e:
+                        self._error(e, batch)
+        finally:
+            with self._condition:
+                self._pending -= size
+                self._condition.notify_all()
+
+    def _error(self, exception, records):
+        self.errors += 1
+        if self.on_error is not None:
+            try:
+                self.on_error(exception, records)
+            except Exception:
+                logging.exception('Error handler failed for %s records', len(records))
+        else:
+            logging.error('Failed to insert %s records: %s', len(records), exception)
@@ -0,0 +1,59 @@
+"""
+Compare deserialization of entity list responses with and without cached per-model deserializers.
+
+    PYTHONPATH=. python benchmarks/deserialize.py --count 200000
+"""
+
+import argparse
+import inspect
+import re
+import timeit
+
+from atsd_client import _jsonutil
+from atsd_client.models import Entity
+
+_underscorer1 = re.compile(r'(.)([A-Z][a-z]+)')
+_underscorer2 = re.compile('([a-z0-9])([A-Z])')
+
+
+def deserialize_uncached(target, model_class):
+    """Previous implementation: inspects the constructor and converts every key with regexes"""
+    if isinstance(target, (list, tuple)):
+        return [deserialize_uncached(el, model_class) for el in target]
+    try:
+        args = inspect.getfullargspec(model_class.__init__).args
+        args.remove('self')
+        params = {}
+        target = {to_snake_case(k): v for k, v in target.items()}
+        for attr in target:
+            if attr in args:
+                params[attr] = target[attr]
+        result_object = model_class(**params)
+        for attr in target:
+            if attr not in args:
+                setattr(result_object, attr, target[attr])
+    except:
+        raise ValueError(str(target) + ' could not be deserialized to ' + str(model_class))
+    return result_object
+
+
+def to_snake_case(cc_str):
+    subbed = _underscorer1.sub(r'\1_\2', cc_str)
+    return _underscorer2.sub(r'\1_\2', subbed).lower()
+
+
+parser = argparse.ArgumentParser(description='Benchmark deserialization of Entity objects')
+parser.add_argument('--count', type=int, default=200000, help='number of entities')
+parser.add_argument('--repeat', type=int, default=3, help='number of measurements, the best one is reported')
+args = parser.parse_args()
+
+response = [{'name': 'entity-{}'.format(i), 'enabled': True, 'label': 'Entity {}'.format(i),
+             'interpolate': 'LINEAR', 'timeZone': 'UTC', 'lastInsertDate': '2018-01-01T00:00:00.000Z',
+             'createdDate': '2017-01-01T00:00:00.000Z', 'tags': {'site': str(i % 10)}}
+            for i in range(args.count)]
+
+assert vars(deserialize_uncached(response[:1], Entity)[0]) == vars(_jsonutil.deserialize(response[:1], Entity)[0])
+
+for name, function in (('uncached', deserialize_uncached), ('cached', _jsonutil.deserialize)):
+    elapsed = min(timeit.repeat(lambda: function(response, Entity), number=1, repeat=args.repeat))
+    print('{:<10} {:8.3f} s {:12.0f} entities/s'.format(name, elapsed, args.count / elapsed))
@@ -0,0 +1,159 @@
+"""
+In-process HTTP server which imitates ATSD API responses for benchmarks.
+
+Series, properties and messages queries return generated records, the number of records per query
+is set with the server attributes. Entity lists and SQL queries return generated rows. Inserts and commands
+are accepted and counted without parsing.
+
+    server = FakeAtsd(samples=10000)
+    server.start()
+    connection = connect_url(server.url, 'axibase', 'axibase')
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+START = 1514764800000
+
+
+def series_response(queries, samples):
+    result = []
+    for query in queries:
+        data = [{'t': START + i * 1000, 'v': i * 0.5} for i in range(samples)]
+        result.append({'entity': query.get('entity', 'bench.entity'), 'metric': query.get('metric', 'bench.metric'),
+                       'tags': {'site': 'bench'}, 'type': 'HISTORY', 'aggregate': {'type': 'DETAIL'},
+                       'data': data})
+    return result
+
+
+def properties_response(queries, count):
+    result = []
+    for query in queries:
+        for i in range(count):
+            result.append({'type': query.get('type', 'bench.type'), 'entity': 'bench.entity',
+                           'key': {'id': str(i)}, 'tags': {'name': 'item {}'.format(i), 'status': 'ok'},
+                           'date': '2018-01-01T00:00:00.000Z'})
+    return result
+
+
+def messages_response(queries, count):
+    result = []
+    for query in queries:
+        for i in range(count):
+            result.append({'entity': 'bench.entity', 'type': query.get('type', 'application'), 'source': 'bench',
+                           'severity': 'NORMAL', 'tags': {'id': str(i)}, 'message': 'message {}'.format(i),
+                           'date': '2018-01-01T00:00:{:02d}.000Z'.format(i % 60)})
+    return result
+
+
+def entities_response(count):
+    return [{'name': 'entity-{}'.format(i), 'enabled': True, 'label': 'Entity {}'.format(i),
+             'interpolate': 'LINEAR', 'timeZone': 'UTC', 'lastInsertDate': '2018-01-01T00:00:00.000Z',
+             'createdDate': '2017-01-01T00:00:00.000Z', 'tags': {'site': str(i % 10)}} for i in range(count)]
+
+
+def sql_response(rows):
+    lines = ['datetime,entity,value']
+    lines.extend('2018-01-01T00:00:{:02d}.000Z,entity-{},{}'.format(i % 60, i % 100, i * 0.5) for i in range(rows))
+    return '\n'.join(lines) + '\n'
+
+
+class FakeAtsdHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        server = self.server
+        path = self.path.split('?')[0]
+        content_type = 'application/json'
+        with server.lock:
+            server.requests += 1
+            server.received_bytes += len(body)
+        if path == '/api/v1/series/query':
+            content = server.cached((path, body), lambda: json.dumps(
+                series_response(json.loads(body.decode('utf-8')), server.samples)))
+        elif path == '/api/v1/properties/query':
+            content = server.cached((path, body), lambda: json.dumps(
+                properties_response(json.loads(body.decode('utf-8')), server.properties)))
+        elif path == '/api/v1/messages/query':
+            content = server.cached((path, body), lambda: json.dumps(
+                messages_response(json.loads(body.decode('utf-8')), server.messages)))
+        elif path == '/api/v1/entities':
+            content = server.cached(path, lambda: json.dumps(entities_response(server.entities)))
+        elif path == '/api/sql':
+            content = server.cached(path, lambda: sql_response(server.rows))
+            content_type = 'text/csv'
+        elif path in ('/api/v1/series/insert', '/api/v1/properties/insert', '/api/v1/messages/insert',
+                      '/api/v1/command'):
+            content = b''
+        else:
+            content = json.dumps({'error': 'Unsupported path ' + path})
+            self._send(404, content.encode('utf-8'), content_type)
+            return
+        self._send(200, content, content_type)
+
+    def _send(self, status, content, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeAtsd(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, samples=1000, properties=1000, messages=1000, entities=1000, rows=10000):
+        """
+        :param samples: `int` samples per series returned for each series query
+        :param properties: `int` properties returned for each properties query
+        :param messages: `int` messages returned for each messages query
+        :param entities: `int` entities returned by the entity list
+        :param rows: `int` rows returned by SQL queries
+        """
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FakeAtsdHandler)
+        self.samples = samples
+        self.properties = properties
+        self.messages = messages
+        self.entities = entities
+        self.rows = rows
+        #: `int` number of received requests
+        self.requests = 0
+        #: `int` total size of received request bodies
+        self.received_bytes = 0
+        self.lock = threading.Lock()
+        self._responses = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def cached(self, key, generate):
+        """Generate response content once for each path and request body, so that benchmarks measure the client"""
+        content = self._responses.get(key)
+        if content is None:
+            content = self._responses[key] = generate().encode('utf-8')
+        return content
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-atsd')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
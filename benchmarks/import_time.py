@@ -0,0 +1,29 @@
+"""
+Measure the time to import the package in a new interpreter, and to import the modules loaded on first use.
+
+    PYTHONPATH=. python benchmarks/import_time.py --repeat 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+STATEMENTS = [
+    ('import atsd_client', 'import atsd_client'),
+    ('connect_url', 'from atsd_client import connect_url'),
+    ('services', 'import atsd_client.services'),
+    ('models', 'import atsd_client.models'),
+]
+
+parser = argparse.ArgumentParser(description='Benchmark import time of atsd_client')
+parser.add_argument('--repeat', type=int, default=10, help='number of measurements, the best one is reported')
+args = parser.parse_args()
+
+env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+code = 'import time; start = time.perf_counter(); {}; print(time.perf_counter() - start)'
+
+for name, statement in STATEMENTS:
+    elapsed = min(float(subprocess.check_output([sys.executable, '-c', code.format(statement)], env=env))
+                  for _ in range(args.repeat))
+    print('{:<20} {:8.1f} ms'.format(name, elapsed * 1000))
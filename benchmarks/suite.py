@@ -0,0 +1,192 @@
+"""
+Measure client-side throughput of serialization, deserialization, inserts and queries
+against an in-process fake ATSD server (see fake_atsd.py), so results do not depend on a database.
+
+    PYTHONPATH=. python benchmarks/suite.py                              # run all cases
+    PYTHONPATH=. python benchmarks/suite.py query_series insert_batched  # run selected cases
+    PYTHONPATH=. python benchmarks/suite.py --save /tmp/atsd-baseline.json
+    PYTHONPATH=. python benchmarks/suite.py --compare /tmp/atsd-baseline.json --tolerance 0.3
+
+Each case is repeated and the best time is reported. With --compare, the script exits with status 1
+if any case is slower than the baseline by more than the tolerance. Timings depend on the machine,
+so no baseline is committed: record one with --save on the machine where the comparison runs,
+for example on the base branch before applying a change.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+from atsd_client import connect_url, BufferedWriter, _jsonutil
+from atsd_client.models import (Series, Sample, Entity, SeriesQuery, SeriesFilter, EntityFilter, DateFilter,
+                                PropertiesQuery, MessageQuery)
+from atsd_client.services import SeriesService, PropertiesService, MessageService, EntitiesService, SQLService
+
+from fake_atsd import FakeAtsd, START, series_response, entities_response
+
+SAMPLES = 10000
+RECORDS = 2000
+
+
+def series_query(metric='bench.metric'):
+    return SeriesQuery(series_filter=SeriesFilter(metric=metric), entity_filter=EntityFilter(entity='bench.entity'),
+                       date_filter=DateFilter(start_date='2018-01-01T00:00:00Z', end_date='2018-01-02T00:00:00Z'))
+
+
+def insert_series(count):
+    series = Series('bench.entity', 'bench.metric', tags={'site': 'bench'})
+    series.add_samples(*[Sample(i * 0.5, START + i * 1000) for i in range(count)])
+    return series
+
+
+class Cases(object):
+    """Benchmark cases, each method runs one operation and returns the number of processed items"""
+
+    def __init__(self, server):
+        self.conn = connect_url(server.url, 'axibase', 'axibase', pool_maxsize=8)
+        self.series = insert_series(SAMPLES)
+        self.series_response = series_response([{}], SAMPLES)
+        self.entities_response = entities_response(RECORDS)
+        date_filter = DateFilter(start_date='2018-01-01T00:00:00Z', end_date='2018-01-02T00:00:00Z')
+        self.properties_query = PropertiesQuery(entity_filter=EntityFilter(entity='bench.entity'),
+                                                date_filter=date_filter, type='bench.type')
+        self.message_query = MessageQuery(entity_filter=EntityFilter(entity='bench.entity'), date_filter=date_filter)
+
+    # ---- local
+
+    def serialize_series(self):
+        self.conn.json_codec.dumps(_jsonutil.serialize([self.series]))
+        return SAMPLES
+
+    def deserialize_series(self):
+        Series.from_dict(self.series_response[0])
+        return SAMPLES
+
+    def deserialize_series_columnar(self):
+        Series.from_dict(self.series_response[0], columnar=True)
+        return SAMPLES
+
+    def deserialize_entities(self):
+        _jsonutil.deserialize(self.entities_response, Entity)
+        return RECORDS
+
+    # ---- inserts
+
+    def insert_series(self):
+        SeriesService(self.conn).insert(self.series)
+        return SAMPLES
+
+    def insert_batched(self):
+        SeriesService(self.conn).insert(self.series, batch_size=1000, max_workers=4)
+        return SAMPLES
+
+    def buffered_writer(self):
+        writer = BufferedWriter(self.conn, max_batch_size=1000)
+        for sample in self.series.data:
+            series = Series('bench.entity', 'bench.metric', tags={'site': 'bench'})
+            series.add_samples(sample)
+            writer.insert(series)
+        writer.close()
+        return SAMPLES
+
+    # ---- queries
+
+    def query_series(self):
+        SeriesService(self.conn).query(series_query())
+        return SAMPLES
+
+    def query_series_columnar(self):
+        SeriesService(self.conn).query(series_query(), columnar=True)
+        return SAMPLES
+
+    def query_series_raw(self):
+        SeriesService(self.conn).query(series_query(), columnar=True, raw=True)
+        return SAMPLES
+
+    def query_parallel(self):
+        queries = [series_query('bench.metric.{}'.format(i)) for i in range(8)]
+        SeriesService(self.conn).query_parallel(queries, max_workers=4, columnar=True)
+        return 8 * SAMPLES
+
+    def query_properties(self):
+        PropertiesService(self.conn).query(self.properties_query)
+        return RECORDS
+
+    def query_messages(self):
+        MessageService(self.conn).query(self.message_query)
+        return RECORDS
+
+    def list_entities(self):
+        EntitiesService(self.conn).list()
+        return RECORDS
+
+    def query_sql(self):
+        SQLService(self.conn).query_with_params('SELECT datetime, entity, value FROM "bench.metric"')
+        return SAMPLES
+
+
+def case_names():
+    return [name for name in vars(Cases) if not name.startswith('_')]
+
+
+def run(names, repeat):
+    server = FakeAtsd(samples=SAMPLES, properties=RECORDS, messages=RECORDS, entities=RECORDS, rows=SAMPLES).start()
+    cases = Cases(server)
+    results = {}
+    try:
+        for name in names:
+            case = getattr(cases, name)
+            items = case()
+            seconds = min(timeit.repeat(case, number=1, repeat=repeat))
+            results[name] = {'seconds': seconds, 'items_per_second': items / seconds}
+            print('{:<28} {:10.4f} s {:14.0f} items/s'.format(name, seconds, items / seconds))
+    finally:
+        cases.conn.close()
+        server.stop()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline['cases'].get(name)
+        if expected is None:
+            continue
+        ratio = result['seconds'] / expected['seconds']
+        status = 'REGRESSION' if ratio > 1 + tolerance else 'ok'
+        print('{:<28} {:6.2f}x baseline {}'.format(name, ratio, status))
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark atsd_client against a fake ATSD server')
+    parser.add_argument('cases', nargs='*', help='cases to run: ' + ', '.join(case_names()))
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements, the best one is reported')
+    parser.add_argument('--save', help='write results to a baseline file')
+    parser.add_argument('--compare', help='compare results with a baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed slowdown relative to the baseline, 0.5 means 50%%')
+    args = parser.parse_args()
+    unknown = set(args.cases) - set(case_names())
+    if unknown:
+        parser.error('unknown cases: ' + ', '.join(sorted(unknown)))
+
+    results = run(args.cases or case_names(), args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'cases': results},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
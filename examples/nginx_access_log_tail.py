@@ -1,7 +1,7 @@
 from __future__ import print_function
 from atsd_client import connect, connect_url
 from atsd_client.models import Message, Severity
-from atsd_client.services import MessageService
+from atsd_client.writer import BufferedWriter
 import socket
 from datetime import datetime
 # Install sh module separately
@@ -36,8 +36,8 @@ ignore_ip = ['192.0.2.1', '127.0.0.1']
 # connection = connect('/path/to/connection.properties')
 connection = connect_url('https://atsd_hostname:8443', 'username', 'password')
 
-# Initialize services
-svc = MessageService(connection)
+# Initialize writer which sends buffered messages in batches every 5 seconds
+writer = BufferedWriter(connection, flush_interval=5)
 
 
 def lookup(addr):
@@ -114,12 +114,5 @@ for line in tail("-F", "/var/log/nginx/access.log", _iter=True):
         # Replace example.org with actual DNS name
         msg = Message('web', 'access.log', 'example.org', datetime.now(), sev, tags, '')
 
-        try:
-            res = svc.insert(msg)
-            print(res, msg.date, msg.tags)
-        except IOError as ioe:
-            print("IOError ({0}):{1}".format(ioe.errno, ioe.strerror))
-            print(msg.date, msg.tags)
-        except:
-            print('Other error')
-            print(msg.date, msg.tags)
+        writer.insert(msg)
+        print(msg.date, msg.tags)
@@ -2,7 +2,7 @@ import logging
 import argparse
 from atsd_client import connect
 from atsd_client.services import SeriesService, EntitiesService, MetricsService
-from atsd_client.models import SeriesQuery, SeriesFilter, EntityFilter, DateFilter, ControlFilter, SampleFilter, Series
+from atsd_client.models import SeriesQuery, SeriesFilter, EntityFilter, DateFilter, ControlFilter, SampleFilter
 
 
 def no_data(series_list):
@@ -66,13 +66,6 @@ if metric_service.get(metric) is None:
 series_service = SeriesService(connection)
 
 
-def insert_or_warning(series_to_insert):
-    if not dry_run:
-        series_service.insert(series_to_insert)
-    else:
-        logging.warning("Dry run enabled, series are not inserted.")
-
-
 dst_entity_filter = EntityFilter(dst_entity)
 dst_date_filter = DateFilter(start_date, 'now')
 series_filter = SeriesFilter(metric, tag_expression=tag_expression)
@@ -123,23 +116,16 @@ for series in dst_series:
         continue
 
     target_series.entity = dst_entity
-    if batch_size == 0:
-        insert_or_warning(target_series)
+    if dry_run:
+        logging.warning("Dry run enabled, series are not inserted.")
+    elif batch_size == 0:
+        series_service.insert(target_series)
     else:
-        size = len(target_series.data)
-        start_position = 0
-        iteration = 1
-        while size > 0:
-            batch_len = min(size, batch_size)
-            batch_data = [target_series.data[i] for i in range(start_position, start_position + batch_len, 1)]
-            batch = Series(target_series.entity, target_series.metric, tags=target_series.tags,
-                           data=batch_data)
-            logging.info("Iteration %s: Sending %s series to ATSD" % (iteration, batch_len))
-            start_position += batch_len
-            iteration += 1
-            size -= batch_len
-            insert_or_warning(batch)
-            logging.info("Pending %s samples to send" % (size))
+        result = series_service.insert(target_series, batch_size=batch_size)
+        logging.info("Sent %s samples in %s batches" % (result.samples, result.batches))
+        for failure in result.failures:
+            logging.warning("Failed to send batch %s with %s samples: %s" % (failure.index, failure.sample_count,
+                                                                           failure.exception))
 
     logging.info("Sent series with '%s' entity, '%s' metric, '%s' tags" % (target_series.entity,
                                                                           target_series.metric, target_series.tags))
@@ -61,7 +61,8 @@ setup(
     license='Apache 2.0',
     install_requires=install_requires,
     extras_require={
-       'analysis': ['pandas']
+       'analysis': ['pandas'],
+       'async': ['httpx']
     },
     long_description=long_description,
     long_description_content_type="text/markdown",
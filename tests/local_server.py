@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import atsd_client
+from atsd_client._time_utilities import to_milliseconds
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def do_PATCH(self):
+        self._respond()
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        self.server.requests.append((self.command, self.path, dict(self.headers), body))
+        content = self.server.responses.get(self.path.split('?')[0])
+        if callable(content):
+            content = content(body)
+        status, headers = 200, {}
+        if isinstance(content, tuple):
+            status, content, headers = (content + ({},))[:3]
+        if content is None:
+            content = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), LocalHandler)
+        #: `list` of (method, path, headers, body) tuples of received requests
+        self.requests = []
+        #: `dict` of ``path: response content`` pairs, content is `bytes`, (status, `bytes`[, headers]) tuple
+        # or function of request body. Other paths respond with {"path": path}
+        self.responses = {}
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset(self):
+        """Forget received requests and configured responses"""
+        del self.requests[:]
+        self.responses.clear()
+
+
+def hourly_series_response(body):
+    """Respond to series queries with hourly samples for 48 hours starting at 2018-01-01"""
+    hour = 3600 * 1000
+    start = 1514764800000
+    result = []
+    for query in json.loads(body.decode('utf-8')):
+        window_start = int(to_milliseconds(query['startDate']))
+        window_end = int(to_milliseconds(query['endDate']))
+        times = [t for t in range(start, start + 48 * hour, hour) if window_start <= t < window_end]
+        if 'aggregate' in query:
+            data = [{'t': window_start, 'v': len(times)}]
+        else:
+            data = [{'t': t, 'v': (t - start) // hour} for t in times]
+        result.append({'entity': 'pyapi.entity', 'metric': 'pyapi.metric', 'tags': {}, 'data': data})
+    return json.dumps(result).encode('utf-8')
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """
+    Base class for tests against a local HTTP server, no ATSD instance required.
+    The server is shared by tests of the class, its requests and responses are reset before each test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.reset()
+
+    def connect(self, url=None, **kwargs):
+        """
+        Connect to the local server, or to the specified urls. The client is closed after the test.
+
+        :return: :class:`.Client`
+        """
+        conn = atsd_client.connect_url(url if url is not None else self.server.url, 'axibase', 'axibase', **kwargs)
+        self.addCleanup(conn.close)
+        return conn
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import pandas as pd
+from atsd_client.models import Series, Sample
+
+ENTITY = 'pyapi.entity'
+METRIC = 'pyapi.metric'
+TIME = 1514764800000
+
+
+class TestSeriesConversion(unittest.TestCase):
+    """
+    Series and pandas conversion tests, no ATSD instance required.
+    """
+
+    def test_to_pandas_series(self):
+        series = Series(ENTITY, METRIC, data=[Sample(2, TIME + 1000), Sample(1, TIME), Sample(3, TIME + 1000)])
+        for s in (series, Series.from_columns(ENTITY, METRIC, [TIME + 1000, TIME, TIME + 1000], [2, 1, 3])):
+            ts = s.to_pandas_series()
+            self.assertIsInstance(ts.index, pd.DatetimeIndex)
+            self.assertIsNotNone(ts.index.tz)
+            self.assertEqual([1, 3], ts.tolist())
+            self.assertEqual(pd.Timestamp(TIME, unit='ms', tz='UTC'), ts.index[0])
+
+    def test_to_pandas_series_iso_times(self):
+        dates = ['2004-04-26T23:41:21.570Z', '2018-01-01T00:00:00.0006Z']
+        data = [{'d': date, 'v': i} for i, date in enumerate(dates)]
+        for columnar in (False, True):
+            series = Series.from_dict({'entity': ENTITY, 'metric': METRIC, 'data': data}, columnar=columnar)
+            ts = series.to_pandas_series()
+            self.assertEqual([pd.Timestamp('2004-04-26T23:41:21.570Z'), pd.Timestamp('2018-01-01T00:00:00.001Z')],
+                             list(ts.index))
+
+    def test_from_pandas_series(self):
+        ts = pd.Series([1.0, 2.0], index=pd.to_datetime([TIME, TIME + 1500], unit='ms', utc=True))
+        for columnar in (False, True):
+            series = Series.from_pandas_series(ENTITY, METRIC, ts, columnar=columnar)
+            self.assertEqual(columnar, series.is_columnar())
+            self.assertEqual([TIME, TIME + 1500], [sample.t for sample in series.data])
+            self.assertEqual([1.0, 2.0], series.values())
+
+    def test_to_pandas_dataframe(self):
+        first = Series.from_columns(ENTITY, METRIC, [TIME, TIME + 1000], [1, 2], tags={'t': 'a'})
+        second = Series(ENTITY, 'pyapi.other', data=[Sample(5, TIME + 1000)])
+        df = Series.to_pandas_dataframe([first, second])
+        self.assertEqual(['pyapi.entity/pyapi.metric/t=a', 'pyapi.entity/pyapi.other'], list(df.columns))
+        self.assertEqual((2, 2), df.shape)
+        self.assertEqual(5, df.iloc[1, 1])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from atsd_client import AsyncClient
+from atsd_client.async_services import AsyncSeriesService, AsyncMetricsService, AsyncPortalsService
+from atsd_client.models import Series, Sample, SeriesQuery, SeriesFilter, EntityFilter, DateFilter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+ENTITY = 'pyapi.entity'
+METRIC = 'pyapi.metric'
+
+
+def handler(request):
+    if request.url.path == '/api/v1/series/query':
+        queries = json.loads(request.content.decode('utf-8'))
+        return httpx.Response(200, json=[{'entity': q['entity'], 'metric': q['metric'], 'tags': {},
+                                          'data': [{'t': 1514764800000, 'v': 1}]} for q in queries])
+    if request.url.path == '/api/v1/series/insert':
+        return httpx.Response(200)
+    if request.url.path == '/api/v1/portal/export':
+        return httpx.Response(200, content=b'PNG' + request.url.params['name'].encode('utf-8'),
+                              headers={'Content-Disposition': 'attachment; filename="portal.png"'})
+    if request.url.path == '/api/v1/metrics/' + METRIC:
+        return httpx.Response(200, json={'name': METRIC, 'enabled': True})
+    return httpx.Response(404, text='not found')
+
+
+@unittest.skipIf(httpx is None, "'httpx' module is not installed")
+class TestAsyncServices(unittest.TestCase):
+    """
+    Async services tests with a local transport, no ATSD instance required.
+    """
+
+    def run_async(self, coroutine_function):
+        async def run():
+            async with AsyncClient('http://atsd', 'axibase', 'axibase', max_concurrency=4,
+                                   transport=httpx.MockTransport(handler)) as conn:
+                return await coroutine_function(conn)
+
+        return asyncio.run(run())
+
+    def test_concurrent_series_queries(self):
+        async def query_all(conn):
+            service = AsyncSeriesService(conn)
+            queries = [SeriesQuery(series_filter=SeriesFilter(metric=METRIC),
+                                   entity_filter=EntityFilter(entity='{}{}'.format(ENTITY, i)),
+                                   date_filter=DateFilter(start_date='now - 1 * HOUR', end_date='now'))
+                       for i in range(20)]
+            return await asyncio.gather(*[service.query(q) for q in queries])
+
+        results = self.run_async(query_all)
+        self.assertEqual(20, len(results))
+        self.assertEqual('{}{}'.format(ENTITY, 7), results[7][0].entity)
+        self.assertEqual(1, results[7][0].get_last_value())
+
+    def test_insert(self):
+        async def insert(conn):
+            series = Series(ENTITY, METRIC)
+            series.add_samples(Sample(1, 1514764800000))
+            return await AsyncSeriesService(conn).insert(series)
+
+        self.assertTrue(self.run_async(insert))
+
+    def test_metric_get_and_missing(self):
+        async def get(conn):
+            service = AsyncMetricsService(conn)
+            return await service.get(METRIC), await service.get('pyapi.missing')
+
+        metric, missing = self.run_async(get)
+        self.assertEqual(METRIC, metric.name)
+        self.assertIsNone(missing)
+
+    def test_get_portal(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'portal.png')
+
+        async def get(conn):
+            return await AsyncPortalsService(conn).get_portal(name='pyapi.portal', portal_file=path, theme='Black')
+
+        self.assertEqual(path, self.run_async(get))
+        with open(path, 'rb') as f:
+            self.assertEqual(b'PNGpyapi.portal', f.read())
+        os.remove(path)
+        os.rmdir(directory)
+        self.assertRaises(ValueError, self.run_async, lambda conn: AsyncPortalsService(conn).get_portal())
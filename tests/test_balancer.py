@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+import time
+import unittest
+
+import requests
+
+import atsd_client
+from atsd_client.balancer import NodePool, LatencyWeighted, get_strategy
+
+from local_server import LocalServer, LocalServerTestCase
+
+
+def unused_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return 'http://127.0.0.1:{}'.format(s.getsockname()[1])
+
+
+class TestMultipleNodes(LocalServerTestCase):
+    """
+    Load balancing and failover tests against local HTTP servers, no ATSD instance required.
+    """
+
+    def test_multiple_nodes(self):
+        second = LocalServer().start()
+        self.addCleanup(second.stop)
+        dead_url = unused_url()
+        conn = self.connect([dead_url, self.server.url, second.url], failure_threshold=1, ejection_time=60)
+        for _ in range(6):
+            self.assertEqual({'path': '/api/v1/version'}, conn.get('v1/version'))
+        for _ in range(2):
+            conn.post('v1/series/insert', [])
+        stats = conn.node_stats()
+        self.assertEqual([dead_url, self.server.url, second.url], [node['url'] for node in stats])
+        self.assertEqual([False, True, True], [node['available'] for node in stats])
+        self.assertEqual([1, 0, 0], [node['failures'] for node in stats])
+        self.assertEqual([1, 0, 0], [node['ejections'] for node in stats])
+        self.assertEqual(['/api/v1/series/insert'] * 2, [r[1] for r in self.server.requests if r[0] == 'POST'])
+        self.assertEqual(6, len([r for r in self.server.requests + second.requests if r[0] == 'GET']))
+        self.assertGreaterEqual(len(second.requests), 2)
+
+    def test_write_failover(self):
+        dropping = socket.socket()
+        dropping.bind(('127.0.0.1', 0))
+        dropping.listen(8)
+        self.addCleanup(dropping.close)
+        dropping_url = 'http://127.0.0.1:{}'.format(dropping.getsockname()[1])
+
+        def drop_connections():
+            while True:
+                try:
+                    client, _ = dropping.accept()
+                except OSError:
+                    return
+                client.recv(65536)
+                client.close()
+
+        thread = threading.Thread(target=drop_connections)
+        thread.daemon = True
+        thread.start()
+        self.connect([unused_url(), self.server.url]).post('v1/series/insert', [])
+        conn = self.connect([dropping_url, self.server.url])
+        self.assertRaises(requests.ConnectionError, conn.post, 'v1/series/insert', [])
+        self.assertEqual({'path': '/api/v1/ping'}, conn.get('v1/ping'))
+        self.connect([dropping_url, self.server.url],
+                     retry_policy=atsd_client.RetryPolicy(max_attempts=1, retry_inserts=True)).post(
+            'v1/series/insert', [])
+        self.assertEqual(['/api/v1/series/insert', '/api/v1/ping', '/api/v1/series/insert'],
+                         [r[1] for r in self.server.requests])
+
+
+class TestNodePool(unittest.TestCase):
+
+    def test_node_pool(self):
+        pool = NodePool(['http://a', 'http://b'], 'least_outstanding', failure_threshold=2, ejection_time=0.05)
+        first = pool.acquire()
+        self.assertIsNot(first, pool.acquire())
+        self.assertEqual([1, 1], [node.outstanding for node in pool.nodes])
+        a, b = pool.nodes
+        pool.release(a, 0.1, True)
+        pool.release(b, 0.1, True)
+        for _ in range(2):
+            pool.release(pool.acquire(read=False), 0.1, False)
+        self.assertEqual([False, True], [node['available'] for node in pool.stats()])
+        self.assertIs(b, pool.acquire(read=False))
+        time.sleep(0.06)
+        self.assertIs(a, pool.acquire(read=False))
+        pool.release(a, 0.1, False)
+        self.assertEqual(2, a.ejections)
+        self.assertGreater(a.ejected_until - time.monotonic(), 0.05)
+        pool.ejection_time = 0
+        pool.release(pool.acquire(exclude=[b]), 0.1, True)
+        self.assertEqual((None, 0), (a.ejected_until, a.consecutive_failures))
+        weighted = LatencyWeighted()
+        a.latency, b.latency = 0.001, 1.0
+        self.assertGreater([weighted.select(pool.nodes) for _ in range(200)].count(a), 150)
+        self.assertRaises(ValueError, get_strategy, 'random')
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import json
+import shutil
+import tempfile
+
+from atsd_client._time_utilities import to_milliseconds, to_date, to_iso
+from atsd_client.cache import SeriesCache, MetadataCache
+from atsd_client.services import SeriesService, MetricsService
+
+from local_server import LocalServerTestCase, hourly_series_response
+
+HOUR = 3600 * 1000
+START = 1514764800000
+
+
+def interval(query, start, end):
+    return dict(query, startDate=to_iso(to_date(start)), endDate=to_iso(to_date(end)))
+
+
+class TestCache(LocalServerTestCase):
+    """
+    Series and metadata cache tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def setUp(self):
+        super(TestCache, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_series_cache(self):
+        self.server.responses['/api/v1/series/query'] = hourly_series_response
+        cache = SeriesCache(self.directory)
+        conn = self.connect()
+        service = SeriesService(conn, cache=cache)
+        query = {'entity': 'pyapi.entity', 'metric': 'pyapi.metric'}
+        first = service.query(interval(query, START, START + 24 * HOUR))
+        second = SeriesService(conn, cache=SeriesCache(self.directory)).query(
+            interval(query, START + HOUR, START + 2 * HOUR))
+        extended = service.query(interval(query, START, START + 36 * HOUR), columnar=True)
+        service.query(interval(dict(query, limit=1), START, START + HOUR))
+        self.assertEqual(list(range(24)), first[0].values())
+        self.assertEqual([1], second[0].values())
+        self.assertEqual(list(range(36)), extended[0].values())
+        self.assertEqual(3, len(self.server.requests))
+        tail_query = json.loads(self.server.requests[1][3].decode('utf-8'))[0]
+        self.assertEqual(START + 24 * HOUR, to_milliseconds(tail_query['startDate']))
+        stats = cache.stats()
+        self.assertEqual((0, 1, 1, 1, 1), (stats['hits'], stats['partial_hits'], stats['misses'],
+                                           stats['bypassed'], stats['entries']))
+        cache.max_bytes = 1
+        cache.evict()
+        self.assertEqual(0, cache.stats()['entries'])
+
+    def test_series_cache_transformed(self):
+        def response_with_meta(body):
+            result = json.loads(hourly_series_response(body).decode('utf-8'))
+            for series in result:
+                series.update(lastInsertDate='2018-01-03T00:00:00.000Z', meta={'metric': {'name': 'pyapi.metric'}})
+            return json.dumps(result).encode('utf-8')
+
+        self.server.responses['/api/v1/series/query'] = response_with_meta
+        service = SeriesService(self.connect(), cache=SeriesCache(self.directory))
+        query = {'entity': 'pyapi.entity', 'metric': 'pyapi.metric', 'addMeta': True,
+                 'aggregate': {'types': ['COUNT'], 'period': {'count': 1, 'unit': 'DAY'}}}
+        full = service.query(interval(query, START, START + 48 * HOUR))
+        same = service.query(interval(query, START, START + 48 * HOUR))
+        part = service.query(interval(query, START, START + 6 * HOUR))
+        self.assertEqual([48], full[0].values())
+        self.assertEqual([48], same[0].values())
+        self.assertIsInstance(same[0].data[0].v, int)
+        self.assertEqual(to_date('2018-01-03T00:00:00.000Z'), same[0].last_insert_date)
+        self.assertEqual('pyapi.metric', same[0].meta['metric'].name)
+        self.assertEqual([6], part[0].values())
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_metadata_cache(self):
+        self.server.responses['/api/v1/metrics/pyapi.metric'] = b'{"name": "pyapi.metric", "label": "Metric"}'
+        self.server.responses['/api/v1/metrics/pyapi.missing'] = (404, b'{"error": "Metric not found"}')
+        cache = MetadataCache(max_size=10, ttl=60)
+        service = MetricsService(self.connect(), cache=cache)
+        metrics = [service.get('pyapi.metric') for _ in range(3)]
+        missing = [service.get('pyapi.missing') for _ in range(3)]
+        service.update(metrics[0])
+        service.get('pyapi.metric')
+        service.get('PYAPI.METRIC')
+        self.assertEqual(['Metric'] * 3, [metric.label for metric in metrics])
+        self.assertEqual([None] * 3, missing)
+        self.assertEqual(['GET', 'GET', 'PATCH', 'GET'], [request[0] for request in self.server.requests])
+        self.assertEqual(5, cache.hits)
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(2, len(cache))
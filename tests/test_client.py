@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import threading
+import time
+import zlib
+
+import atsd_client
+from atsd_client.services import SeriesService
+
+from local_server import LocalServerTestCase
+
+
+class TestClient(LocalServerTestCase):
+    """
+    Client tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def test_pool_reuses_connection(self):
+        conn = self.connect(pool_maxsize=4)
+        for _ in range(5):
+            self.assertEqual(conn.get('v1/version'), {'path': '/api/v1/version'})
+        stats = conn.pool_stats()
+        self.assertEqual(stats['pools'], 1)
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections_idle'], 1)
+
+    def test_keep_alive_timeout_expires_idle_connection(self):
+        conn = self.connect(keep_alive_timeout=0.1)
+        conn.get('v1/version')
+        time.sleep(0.2)
+        conn.get('v1/version')
+        stats = conn.pool_stats()
+        self.assertEqual(stats['connections_expired'], 1)
+        self.assertEqual(stats['requests'], 2)
+
+    def test_pool_parameters_from_properties(self):
+        conn = atsd_client._client.Client(self.server.url, pool_connections='2', pool_maxsize='16',
+                                          pool_block='True', keep_alive_timeout='30')
+        conn.close()
+        self.assertEqual(conn.adapter._pool_connections, 2)
+        self.assertEqual(conn.adapter._pool_maxsize, 16)
+        self.assertTrue(conn.adapter._pool_block)
+        self.assertEqual(conn.adapter.keep_alive_timeout, 30.0)
+
+    def test_json_codec(self):
+        self.server.responses['/api/v1/series/query'] = b'[{"entity": "pyapi.entity", "metric": "pyapi.metric", ' \
+                                                         b'"tags": {}, "data": [{"t": 1514764800000, "v": 1.5}]}]'
+        for codec in ('json', 'auto'):
+            del self.server.requests[:]
+            series = SeriesService(self.connect(json_codec=codec)).query({'entity': 'pyapi.entity',
+                                                                          'metric': 'pyapi.metric'})
+            method, path, headers, body = self.server.requests[0]
+            self.assertEqual('application/json', headers['Content-Type'])
+            self.assertEqual([{'entity': 'pyapi.entity', 'metric': 'pyapi.metric'}], json.loads(body.decode('utf-8')))
+            self.assertEqual([1.5], series[0].values())
+        self.assertRaises(ValueError, atsd_client._client.Client, self.server.url, json_codec='unknown')
+
+    def test_request_compression(self):
+        series = [{'entity': 'pyapi.entity', 'metric': 'pyapi.metric',
+                   'data': [{'t': 1514764800000 + i, 'v': i} for i in range(1000)]}]
+        for compression, decompress in (('gzip', gzip.decompress), ('deflate', zlib.decompress)):
+            conn = self.connect(compression=compression, compression_level=9, compression_threshold=100)
+            del self.server.requests[:]
+            conn.post('v1/series/insert', series)
+            conn.post('v1/command', 'series e:e m:m=1')
+            method, path, headers, body = self.server.requests[0]
+            self.assertEqual(compression, headers['Content-Encoding'])
+            self.assertLess(len(body), len(json.dumps(series)) / 5)
+            self.assertEqual(series, json.loads(decompress(body).decode('utf-8')))
+            self.assertNotIn('Content-Encoding', self.server.requests[1][2])
+        self.assertRaises(ValueError, atsd_client._client.Client, self.server.url, compression='br')
+
+    def test_session_per_thread(self):
+        with self.connect(session_per_thread=True) as conn:
+            barrier = threading.Barrier(4)
+            sessions = []
+
+            def work():
+                barrier.wait()
+                for _ in range(3):
+                    conn.get('v1/version')
+                sessions.append(conn.session)
+
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = conn.pool_stats()
+            self.assertEqual(4, len(set(map(id, sessions))))
+            self.assertEqual(('axibase', 'axibase'), sessions[0].auth)
+            self.assertEqual((4, 12), (stats['sessions'], stats['requests']))
+            conn.get('v1/version')
+            self.assertIs(conn.session, conn.session)
+            self.assertEqual(5, conn.pool_stats()['sessions'])
+            conn.close_thread_session()
+            self.assertEqual(4, conn.pool_stats()['sessions'])
+        self.assertEqual(0, conn.pool_stats()['sessions'])
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['requests', 'urllib3', 'dateutil', 'pytz', 'tzlocal', 'pandas', 'atsd_client.services',
+                 'atsd_client.models']
+
+#: upper limit of `import atsd_client` duration in seconds, generous to tolerate slow machines
+MAX_IMPORT_SECONDS = 0.05
+
+
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.check_output([sys.executable, '-c', code], env=env, cwd=PACKAGE_ROOT)
+    return json.loads(output.decode('utf-8'))
+
+
+class TestImports(unittest.TestCase):
+    """
+    Importing the package must not load requests, date parsing and time zone modules, or configure logging.
+    """
+
+    def test_import_is_lazy(self):
+        result = run_python(
+            'import json, logging, sys, time\n'
+            'start = time.perf_counter()\n'
+            'import atsd_client\n'
+            'elapsed = time.perf_counter() - start\n'
+            'print(json.dumps({"loaded": [m for m in %r if m in sys.modules], "elapsed": elapsed,\n'
+            '                  "handlers": len(logging.getLogger().handlers)}))' % HEAVY_MODULES)
+        self.assertEqual([], result['loaded'])
+        self.assertEqual(0, result['handlers'])
+        self.assertLess(result['elapsed'], MAX_IMPORT_SECONDS)
+
+    def test_lazy_attributes(self):
+        result = run_python(
+            'import json, atsd_client\n'
+            'from atsd_client import connect_url, RetryPolicy\n'
+            'print(json.dumps([atsd_client.services.SeriesService.__name__, atsd_client.models.Series.__name__,\n'
+            '                  atsd_client.exceptions.ServerException.__name__, connect_url.__module__,\n'
+            '                  "connect" in dir(atsd_client)]))')
+        self.assertEqual(['SeriesService', 'Series', 'ServerException', 'atsd_client.connection', True], result)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from atsd_client import _jsonutil
+
+
+class Model(object):
+    instances = 0
+
+    def __init__(self, entity, last_insert_date=None):
+        Model.instances += 1
+        self.entity = entity
+        self.last_insert_date = last_insert_date
+
+
+class TestJsonUtil(unittest.TestCase):
+
+    def setUp(self):
+        Model.instances = 0
+        _jsonutil._deserializers.pop(Model, None)
+
+    def test_constructor_arguments_and_attributes(self):
+        result = _jsonutil.deserialize({'entity': 'e', 'lastInsertDate': '2018-01-01T00:00:00Z',
+                                        'createdDate': '2017-01-01T00:00:00Z', 'tagsMap': {'a': 'b'}}, Model)
+        self.assertEqual('e', result.entity)
+        self.assertEqual('2018-01-01T00:00:00Z', result.last_insert_date)
+        self.assertEqual('2017-01-01T00:00:00Z', result.created_date)
+        self.assertEqual({'a': 'b'}, result.tags_map)
+        self.assertEqual(1, Model.instances)
+
+    def test_deserializer_is_reused(self):
+        results = _jsonutil.deserialize([{'entity': 'e{}'.format(i), 'lastInsertDate': i, 'enabledFlag': i % 2 == 0}
+                                         for i in range(3)], Model)
+        deserializer = _jsonutil._deserializers[Model]
+        self.assertEqual(['e0', 'e1', 'e2'], [r.entity for r in results])
+        self.assertEqual([0, 1, 2], [r.last_insert_date for r in results])
+        self.assertEqual([True, False, True], [r.enabled_flag for r in results])
+        _jsonutil.deserialize({'entity': 'e3'}, Model)
+        self.assertIs(deserializer, _jsonutil._deserializers[Model])
+        self.assertIsNone(_jsonutil._deserializers[Model]({'entity': 'e4'}).last_insert_date)
+        self.assertEqual(5, Model.instances)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, _jsonutil.deserialize, {'lastInsertDate': 1}, Model)
+
+    def test_snake_case_keys_limit(self):
+        with mock.patch.dict(_jsonutil._snake_case_keys, clear=True), \
+                mock.patch.object(_jsonutil, '_snake_case_keys_limit', 2):
+            result = _jsonutil.deserialize({'entity': 'e', 'lastInsertDate': 1, 'firstKey': 2, 'secondKey': 3}, Model)
+            self.assertEqual({'entity': 'entity', 'lastInsertDate': 'last_insert_date'}, _jsonutil._snake_case_keys)
+            self.assertEqual((1, 2, 3), (result.last_insert_date, result.first_key, result.second_key))
+            self.assertEqual('third_key', _jsonutil.to_snake_case('thirdKey'))
+            self.assertEqual(2, len(_jsonutil._snake_case_keys))
@@ -4,7 +4,7 @@ import time
 from datetime import datetime
 from atsd_client.models import EntityFilter, DateFilter
 from atsd_client.models import Message
-from atsd_client.models import MessageQuery
+from atsd_client.models import MessageQuery, MessageStatisticsQuery, Series
 from service_test_base import ServiceTestBase
 
 ENTITY = 'pyapi.message_service.entity'
@@ -71,6 +71,19 @@ class TestMessageService(ServiceTestBase):
         self.assertEqual(MESSAGE_2, m.message)
         self.common_checks(m)
 
+    def test_statistics(self):
+        """
+        Check message count is returned as series.
+        """
+        query = MessageStatisticsQuery(entity_filter=ef, date_filter=df, type=TYPE, source=SOURCE)
+        result = self.service.statistics(query)
+        # print(result)
+        self.assertEqual(1, len(result))
+        series = result[0]
+        self.assertIsInstance(series, Series)
+        self.assertEqual(ENTITY, series.entity)
+        self.assertEqual(2, sum(series.values()))
+
     def common_checks(self, message):
         self.assertEqual(TYPE, message.type)
         self.assertEqual(SOURCE, message.source)
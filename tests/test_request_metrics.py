@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import atsd_client
+from atsd_client.exceptions import ServerException
+
+from local_server import LocalServerTestCase
+
+
+class TestRequestMetrics(LocalServerTestCase):
+    """
+    Request hooks and metrics tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def test_request_metrics(self):
+        self.server.responses['/api/v1/series/query'] = b'[]'
+        self.server.responses['/api/v1/metrics/pyapi.missing'] = (404, b'{"error": "not found"}')
+        conn = self.connect()
+        events = []
+        conn.add_hook('before_send', lambda event: events.append(('before_send', event.endpoint, event.status)))
+        conn.add_hook('after_response', lambda event: events.append(('after_response', event.endpoint, event.status)))
+        conn.add_hook('on_error', lambda event: events.append(('on_error', event.endpoint, event.status)))
+        metrics = atsd_client.MetricsCollector().attach(conn)
+        conn.post('v1/series/query', [{'entity': 'pyapi.entity', 'metric': 'pyapi.metric'}])
+        conn.post('v1/series/query', [])
+        self.assertRaises(ServerException, conn.get, 'v1/metrics/pyapi.missing')
+        self.assertEqual([('before_send', 'v1/series/query', None), ('after_response', 'v1/series/query', 200)] * 2
+                         + [('before_send', 'v1/metrics/{metric}', None), ('on_error', 'v1/metrics/{metric}', 404)],
+                         events)
+        query = metrics.get('v1/series/query')
+        self.assertEqual(2, query.requests)
+        self.assertEqual(len(b'[{"entity": "pyapi.entity", "metric": "pyapi.metric"}]') + 2, query.request_bytes)
+        self.assertEqual(4, query.response_bytes)
+        self.assertEqual(2, query.latency.count)
+        self.assertEqual(2, query.deserialization.count)
+        missing = metrics.get('v1/metrics/{metric}', method='GET')
+        self.assertEqual((1, {404: 1}), (missing.errors, missing.statuses))
+        text = atsd_client.metrics.prometheus_text(metrics)
+        self.assertIn('atsd_client_requests_total{method="POST",endpoint="v1/series/query"} 2', text)
+        self.assertIn('atsd_client_request_seconds_bucket{method="GET",endpoint="v1/metrics/{metric}",le="+Inf"} 1',
+                      text)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import atsd_client
+from atsd_client.exceptions import ServerException
+
+from local_server import LocalServerTestCase
+
+
+class TestRetryPolicy(LocalServerTestCase):
+    """
+    Retry policy tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def test_retry_policy(self):
+        attempts = []
+
+        def unavailable(body):
+            attempts.append(body)
+            return (503, b'unavailable', {'Retry-After': '0'}) if len(attempts) < 3 else b'[]'
+
+        self.server.responses['/api/v1/series/query'] = unavailable
+        self.server.responses['/api/v1/series/insert'] = (503, b'unavailable')
+        policy = atsd_client.RetryPolicy(max_attempts=3, backoff_base=0.01)
+        conn = self.connect(retry_policy=policy)
+        self.assertEqual([], conn.post('v1/series/query', []))
+        self.assertRaises(ServerException, conn.post, 'v1/series/insert', [])
+        self.assertEqual(['/api/v1/series/query'] * 3 + ['/api/v1/series/insert'],
+                         [request[1] for request in self.server.requests])
+        self.assertEqual({'retries': 2, 'recovered': 1, 'exhausted': 0}, policy.stats())
+
+    def test_policy_parameters(self):
+        policy = atsd_client.RetryPolicy()
+        self.assertTrue(policy.is_idempotent('POST', 'sql'))
+        self.assertFalse(policy.is_idempotent('POST', 'v1/command'))
+        self.assertEqual(0.5, atsd_client.RetryPolicy(backoff_base=0.25, jitter=False).delay(2))
+        self.assertEqual(30.0, atsd_client.RetryPolicy(jitter=False).delay(1, retry_after='120'))
+        conn = atsd_client._client.Client(self.server.url, retry_policy='4')
+        conn.close()
+        self.assertEqual(4, conn.retry_policy.max_attempts)
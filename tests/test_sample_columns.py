@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from atsd_client.models import Series, Sample, SampleColumns
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def iso(ms):
+    return (EPOCH + timedelta(milliseconds=ms)).strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(ms % 1000)
+
+
+class TestSampleColumns(unittest.TestCase):
+
+    def test_iso_times(self):
+        times = [1083022881570] + [random.randint(0, 2 ** 41) for _ in range(5000)]
+        data = [{'d': iso(ms), 'v': i} for i, ms in enumerate(times)]
+        series = Series.from_dict({'entity': 'pyapi.entity', 'metric': 'pyapi.metric', 'data': data}, columnar=True)
+        self.assertEqual(times, list(series.data.times))
+        self.assertEqual(570000, series.data[0].get_date().microsecond)
+        columns = SampleColumns()
+        columns.extend(Sample(i, iso(ms)) for i, ms in enumerate(times))
+        self.assertEqual(times, list(columns.times))
+
+    def test_fraction_of_millisecond(self):
+        columns = SampleColumns.from_dicts([{'d': '2018-01-01T00:00:00.0006Z', 'v': 1},
+                                            {'t': 1514764800000.4, 'v': 2}])
+        self.assertEqual([1514764800001, 1514764800000], list(columns.times))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+
+from atsd_client.exceptions import ServerException
+from atsd_client.models import Series, Sample
+from atsd_client.services import SeriesService
+
+from local_server import LocalServerTestCase
+
+
+class TestSeriesInsert(LocalServerTestCase):
+    """
+    Series insert tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def test_batched_insert(self):
+        def insert_response(body):
+            values = [sample['v'] for series in json.loads(body.decode('utf-8')) for sample in series['data']]
+            return (500, b'{"error": "failed batch"}') if 13 in values else b''
+
+        self.server.responses['/api/v1/series/insert'] = insert_response
+        series = [Series('pyapi.entity', 'pyapi.metric{}'.format(i), tags={'site': 'a'}) for i in range(2)]
+        for i in range(40):
+            series[i // 20].add_samples(Sample(i, 1514764800000 + i * 1000))
+        result = SeriesService(self.connect(pool_maxsize=4)).insert(*series, batch_bytes=600, max_workers=4)
+        bodies = [json.loads(body.decode('utf-8')) for _, _, _, body in self.server.requests]
+        self.assertGreater(len(bodies), 2)
+        self.assertTrue(all(len(body) <= 600 for _, _, _, body in self.server.requests))
+        sent = sorted(sample['v'] for batch in bodies for s in batch for sample in s['data'])
+        self.assertEqual(list(range(40)), sent)
+        self.assertEqual(len(bodies), result.batches)
+        self.assertEqual(40, result.samples)
+        self.assertFalse(result)
+        self.assertEqual(1, len(result.failures))
+        failure = result.failures[0]
+        self.assertIsInstance(failure.exception, ServerException)
+        self.assertIn(13, [sample['v'] for s in failure.batch for sample in s['data']])
+        self.assertEqual(failure.sample_count, result.failed_samples)
+        self.assertEqual(sum(len(s['data']) for s in failure.batch), failure.sample_count)
+
+    def test_insert_batch_size(self):
+        self.server.responses['/api/v1/series/insert'] = b''
+        series = [Series('pyapi.entity', 'pyapi.metric{}'.format(i)) for i in range(2)]
+        for i in range(3000):
+            series[i // 1500].add_samples(Sample(i, 1514764800000 + i * 1000))
+        result = SeriesService(self.connect()).insert(*series, batch_size=1000)
+        bodies = [json.loads(body.decode('utf-8')) for _, _, _, body in self.server.requests]
+        self.assertEqual([[1000], [500, 500], [1000]], [[len(s['data']) for s in batch] for batch in bodies])
+        self.assertEqual(list(range(3000)), [sample['v'] for batch in bodies for s in batch for sample in s['data']])
+        self.assertEqual((3, 3000, True), (result.batches, result.samples, bool(result)))
+
+    def test_csv_insert(self):
+        self.server.responses['/api/v1/series/csv/pyapi.entity'] = b''
+        progress = []
+        rows = [['time', 'pyapi.metric1', 'pyapi.metric2']] + \
+               [['2018-01-01T00:00:{:02d}Z'.format(i), i, i * 2] for i in range(25)]
+        count = SeriesService(self.connect()).csv_insert('pyapi.entity', iter(rows), tags={'site': 'a'},
+                                                         chunk_size=10, compress=True,
+                                                         progress=lambda *args: progress.append(args))
+        self.assertEqual(25, count)
+        self.assertEqual([10, 20, 25], [rows_sent for rows_sent, _ in progress])
+        chunks = []
+        for method, path, headers, body in self.server.requests:
+            self.assertEqual('/api/v1/series/csv/pyapi.entity?site=a', path)
+            self.assertEqual('gzip', headers['Content-Encoding'])
+            chunks.append(gzip.decompress(body).decode('utf-8').splitlines())
+        self.assertEqual([11, 11, 6], [len(chunk) for chunk in chunks])
+        self.assertEqual(['time,pyapi.metric1,pyapi.metric2'] * 3, [chunk[0] for chunk in chunks])
+        self.assertEqual('2018-01-01T00:00:24Z,24,48', chunks[2][-1])
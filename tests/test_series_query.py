@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+from datetime import timedelta
+
+from atsd_client._jsonstream import iter_array
+from atsd_client._time_utilities import to_milliseconds, to_date, to_iso
+from atsd_client.models import SeriesQuery, SeriesFilter, EntityFilter, DateFilter, SeriesUrlQuery
+from atsd_client.services import SeriesService
+
+from local_server import LocalServerTestCase, hourly_series_response
+
+HOUR = 3600 * 1000
+START = 1514764800000
+
+
+class TestSeriesQuery(LocalServerTestCase):
+    """
+    Series query tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def test_iter_query_streams_series(self):
+        data = [{'t': START + i, 'v': i} for i in range(1000)]
+        self.server.responses['/api/v1/series/query'] = json.dumps(
+            [{'entity': 'pyapi.entity', 'metric': 'pyapi.metric', 'tags': {}, 'data': data},
+             {'entity': 'pyapi.entity', 'metric': 'pyapi.other', 'tags': {}, 'data': data[:10]}]).encode('utf-8')
+        service = SeriesService(self.connect())
+        series = list(service.iter_query())
+        chunks = list(service.iter_query(chunk_size=300, columnar=True))
+        self.assertEqual([1000, 10], [len(s.data) for s in series])
+        self.assertEqual([300, 300, 300, 100, 10], [len(s.data) for s in chunks])
+        self.assertEqual(['pyapi.metric'] * 4 + ['pyapi.other'], [s.metric for s in chunks])
+        self.assertEqual(999, chunks[3].get_last_value())
+
+    def test_iter_array_small_chunks(self):
+        data = [{'t': START + i, 'v': i, 'x': {'text': 'a\\"}]'}} if i % 3 == 0 else {'t': START + i, 'v': i}
+                for i in range(10)]
+        elements = [{'entity': 'pyapi.entity', 'tags': {'s': '[{'}, 'data': data, 'meta': {'n': [1]}},
+                    {'entity': 'pyapi.other', 'data': []}]
+        text = json.dumps(elements).encode('utf-8')
+        for size in (1, 7, len(text)):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual(elements, list(iter_array(chunks)))
+            parts = list(iter_array(chunks, chunk_size=4))
+            self.assertEqual([4, 4, 2, 0], [len(part['data']) for part in parts])
+            self.assertEqual(data, [sample for part in parts[:3] for sample in part['data']])
+            self.assertEqual([False, False, True, False], ['meta' in part for part in parts])
+        self.assertRaises(ValueError, list, iter_array([text[:-1]]))
+        self.assertRaises(ValueError, list, iter_array([text + b' []']))
+
+    def test_raw_query(self):
+        self.server.responses['/api/v1/series/query'] = b'[{"entity": "pyapi.entity", "metric": "pyapi.metric", ' \
+                                                         b'"tags": {}, "data": [{"t": 1514764800000, "v": 1}]}]'
+        query = SeriesQuery(series_filter=SeriesFilter(metric='pyapi.metric'),
+                            entity_filter=EntityFilter(entity='pyapi.entity'),
+                            date_filter=DateFilter(interval={'count': 1, 'unit': 'HOUR'}))
+        series = SeriesService(self.connect()).query(query, raw=True)
+        self.assertEqual('milliseconds', json.loads(self.server.requests[0][3].decode('utf-8'))[0]['timeFormat'])
+        self.assertFalse(hasattr(query, 'timeFormat'))
+        sample = series[0].data[0]
+        self.assertEqual(START, sample.t)
+        self.assertIsInstance(sample.t, int)
+        self.assertEqual(START, to_milliseconds(sample.get_date()))
+
+    def test_query_parallel(self):
+        self.server.responses['/api/v1/series/query'] = lambda body: json.dumps(
+            [dict(query, tags={}, data=[]) for query in json.loads(body.decode('utf-8'))]).encode('utf-8')
+        service = SeriesService(self.connect(pool_maxsize=4))
+        queries = [{'entity': 'pyapi.entity', 'metric': 'pyapi.metric{}'.format(i)} for i in range(10)]
+        result = service.query_parallel(queries, max_workers=4, queries_per_request=3)
+        self.assertEqual(['pyapi.metric{}'.format(i) for i in range(10)], [s.metric for s in result])
+        self.assertEqual(4, len(self.server.requests))
+        self.assertEqual([3, 3, 3, 1], [p.result_count for p in result.partitions])
+        self.assertTrue(all(p.elapsed >= 0 for p in result.partitions))
+
+    def test_query_split(self):
+        self.server.responses['/api/v1/series/query'] = hourly_series_response
+        query = SeriesQuery(series_filter=SeriesFilter(metric='pyapi.metric'),
+                            entity_filter=EntityFilter(entity='pyapi.entity'),
+                            date_filter=DateFilter(start_date=to_date(START), end_date=to_date(START + 48 * HOUR)))
+        service = SeriesService(self.connect(pool_maxsize=4))
+        by_window = service.query_split(query, window={'count': 12, 'unit': 'HOUR'})
+        by_count = service.query_split(query, target_samples=10, columnar=True)
+        chunks = list(service.iter_query_split(query, window=timedelta(days=1), max_workers=2))
+        self.assertEqual(4, len(by_window.partitions))
+        self.assertEqual(list(range(48)), by_window[0].values())
+        self.assertEqual(5, len(by_count.partitions))
+        self.assertEqual(list(range(48)), by_count[0].values())
+        self.assertEqual([24, 24], [len(s.data) for s in chunks])
+        self.assertRaises(ValueError, service.query_split, {'entity': 'e', 'metric': 'm', 'interval': {'count': 1,
+                                                            'unit': 'DAY'}}, window=HOUR)
+
+    def test_query_split_aggregated(self):
+        self.server.responses['/api/v1/series/query'] = hourly_series_response
+        service = SeriesService(self.connect(pool_maxsize=4))
+        aggregated = {'entity': 'pyapi.entity', 'metric': 'pyapi.metric', 'startDate': to_iso(to_date(START)),
+                      'endDate': to_iso(to_date(START + 48 * HOUR)),
+                      'aggregate': {'types': ['COUNT'], 'period': {'count': 1, 'unit': 'DAY', 'align': 'START_TIME'}}}
+        by_period = service.query_split(aggregated, target_samples=1)
+        windows = [json.loads(body.decode('utf-8'))[0] for _, _, _, body in self.server.requests[1:]]
+        end_aligned = service._plan_windows(dict(aggregated, startDate=to_iso(to_date(START + 12 * HOUR)),
+                                                 aggregate={'type': 'COUNT', 'period': {'count': 1, 'unit': 'DAY',
+                                                                                       'align': 'END_TIME'}}),
+                                            {'count': 1, 'unit': 'DAY'}, None)
+        self.assertEqual([24, 24], by_period[0].values())
+        self.assertEqual([{'count': 1, 'unit': 'DAY', 'align': 'START_TIME'}] * 2,
+                         [w['aggregate']['period'] for w in windows])
+        self.assertEqual([START + 24 * HOUR, START + 48 * HOUR],
+                         sorted(to_milliseconds(w['endDate']) for w in windows))
+        self.assertEqual([(START + 12 * HOUR, START + 24 * HOUR), (START + 24 * HOUR, START + 48 * HOUR)],
+                         [(to_milliseconds(q['startDate']), to_milliseconds(q['endDate'])) for q in end_aligned])
+        self.assertRaises(ValueError, service.query_split, aggregated, window={'count': 12, 'unit': 'HOUR'})
+        for align in (None, 'CALENDAR', 'FIRST_VALUE_TIME'):
+            period = {'count': 1, 'unit': 'DAY', 'align': align} if align else {'count': 1, 'unit': 'DAY'}
+            calendar = dict(aggregated, aggregate={'type': 'AVG', 'period': period})
+            self.assertRaises(ValueError, service.query_split, calendar, window={'count': 1, 'unit': 'DAY'})
+
+    def test_url_query(self):
+        self.server.responses['/api/v1/series/json/pyapi.entity/pyapi.metric'] = \
+            b'[{"entity": "pyapi.entity", "metric": "pyapi.metric", "tags": {}, "data": [{"t": 1514764800000, "v": 1}]}]'
+        self.server.responses['/api/v1/series/csv/pyapi.entity/pyapi.metric'] = \
+            b'time,entity,metric,value\n2018-01-01T00:00:00.000Z,pyapi.entity,pyapi.metric,1\n'
+        queries = [SeriesUrlQuery('pyapi.entity', 'pyapi.metric', format=output_format, tags={'site': 'a'},
+                                  interval={'count': 1, 'unit': 'DAY'}) for output_format in ('json', 'csv', 'csv')]
+        output = io.BytesIO()
+        result = SeriesService(self.connect()).url_query(*queries, max_workers=3, files=[None, None, output])
+        self.assertEqual([1], result[0].values())
+        self.assertTrue(result[1].startswith('time,entity,metric,value\n'))
+        self.assertIs(output, result[2])
+        self.assertEqual(result[1], output.getvalue().decode('utf-8'))
+        self.assertEqual(['GET'] * 3, [request[0] for request in self.server.requests])
+        self.assertIn('tags.site=a', self.server.requests[0][1])
+        self.assertIn('interval=1-DAY', self.server.requests[0][1])
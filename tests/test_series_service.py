@@ -10,7 +10,7 @@ from atsd_client.models import AggregateType, SeriesFilter, EntityFilter, DateFi
     TransformationFilter, Group, Rate, SampleFilter
 from atsd_client.models import Series
 from atsd_client.models import SeriesQuery
-from atsd_client.models import TimeUnit, Sample
+from atsd_client.models import TimeUnit, Sample, SampleColumns
 
 from service_test_base import ServiceTestBase
 
@@ -78,6 +78,25 @@ class TestSeriesService(ServiceTestBase):
         self.assertGreater(len(s.data), 0)
         self.assertEqual(s.get_last_value(), val)
 
+    def test_query_columnar(self):
+        val = random.randint(0, VALUE - 1)
+
+        insert_series_sample(self.service, val)
+        time.sleep(WAIT_TIME + 2)
+
+        now = datetime.now()
+        sf = SeriesFilter(metric=METRIC, tags={TAG: [TAG_VALUE]})
+        ef = EntityFilter(entity=ENTITY)
+        df = DateFilter(start_date=now - timedelta(hours=1), end_date=now)
+        query = SeriesQuery(series_filter=sf, entity_filter=ef, date_filter=df)
+
+        series = self.service.query(query, columnar=True)[0]
+        self.assertTrue(series.is_columnar())
+        self.assertIsInstance(series.data, SampleColumns)
+        self.assertGreater(len(series.data), 0)
+        self.assertEqual(series.get_last_value(), val)
+        self.assertEqual(series.data[-1].t, series.data.times[-1])
+
     def test_aggregate_series(self):
         val = random.randint(0, VALUE - 1)
 
@@ -130,6 +149,17 @@ class TestSeriesService(ServiceTestBase):
         self.assertIsNotNone(last_sample.version)
         self.assertEqual(last_sample.version['status'], test_status)
 
+    def test_insert_batches(self):
+        now = int(time.time() * 1000)
+        series = Series(ENTITY, METRIC, tags={TAG: TAG_VALUE})
+        series.add_samples(*[Sample(i, now - (25 - i) * 1000) for i in range(25)])
+
+        result = self.service.insert(series, batch_size=10, max_workers=2)
+        self.assertTrue(result)
+        self.assertEqual(3, result.batches)
+        self.assertEqual(25, result.samples)
+        self.assertEqual([], result.failures)
+
     def test_series_data_field_empty(self):
         series = Series(entity=ENTITY,
                         metric=METRIC)
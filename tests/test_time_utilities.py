@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from dateutil.parser import parse
+
+from atsd_client._time_utilities import to_milliseconds, to_milliseconds_many, to_date, timezone_ensure
+
+DATES = ['2018-01-01T00:00:00.000Z', '2018-06-30T13:45:12.123456789Z', '2018-01-01T03:00:00+03:00',
+         '2018-01-01T03:00:00-0530', '2016-02-29T23:59:59.999Z', '1969-12-31T23:59:59.5Z']
+
+
+class TestTimeUtilities(unittest.TestCase):
+
+    def test_iso_fast_path_matches_dateutil(self):
+        for date in DATES:
+            expected = timezone_ensure(parse(date))
+            self.assertEqual(expected, to_date(date))
+            self.assertEqual(expected.tzinfo, to_date(date).tzinfo)
+            self.assertEqual(to_milliseconds(expected), to_milliseconds(date))
+
+    def test_to_milliseconds_many(self):
+        dates = DATES + ['2018-01-01 00:00:00Z', 1514764800000, parse('2018-01-01T00:00:00Z')]
+        self.assertEqual([to_milliseconds(date) for date in dates], to_milliseconds_many(dates))
+
+    def test_invalid_date(self):
+        self.assertRaises(ValueError, to_milliseconds, '2018-02-30T00:00:00Z')
+        self.assertRaises(ValueError, to_date, '2018-01-01T25:00:00Z')
+
+    def test_exact_milliseconds(self):
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        for ms in [1083022881570] + [random.randint(0, 2 ** 41) for _ in range(2000)]:
+            dt = epoch + timedelta(milliseconds=ms)
+            iso = dt.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(ms % 1000)
+            self.assertEqual(ms, to_milliseconds(iso))
+            self.assertIsInstance(to_milliseconds(iso), int)
+            self.assertEqual(ms, to_milliseconds(dt))
+            self.assertEqual([ms], to_milliseconds_many([iso]))
+        self.assertEqual(1514764800000.5, to_milliseconds('2018-01-01T00:00:00.0005Z'))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+
+import atsd_client
+from atsd_client.models import Series, Sample, Message
+from atsd_client.writer import BufferedWriter, OverflowPolicy
+
+from local_server import LocalServerTestCase
+
+ENTITY = 'pyapi.entity'
+METRIC = 'pyapi.metric'
+TIME = 1514764800000
+
+
+class TestBufferedWriter(LocalServerTestCase):
+    """
+    BufferedWriter tests against a local HTTP server, no ATSD instance required.
+    """
+
+    def setUp(self):
+        super(TestBufferedWriter, self).setUp()
+        self.connection = self.connect()
+
+    def test_coalesce_records_from_threads(self):
+        writer = BufferedWriter(self.connection, max_batch_size=100, flush_interval=60)
+
+        def produce():
+            for i in range(200):
+                writer.insert(Series(ENTITY, METRIC, data=[Sample(i, TIME + i)]),
+                              Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME, message=str(i)))
+
+        threads = [threading.Thread(target=produce) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.close()
+
+        samples = sum(len(series['data']) for method, path, headers, body in self.server.requests
+                      if path == '/api/v1/series/insert' for series in json.loads(body.decode('utf-8')))
+        messages = sum(len(json.loads(body.decode('utf-8'))) for method, path, headers, body in self.server.requests
+                       if path == '/api/v1/messages/insert')
+        self.assertEqual(800, samples)
+        self.assertEqual(800, messages)
+        self.assertEqual(1600, writer.sent)
+        self.assertLess(len(self.server.requests), 40)
+
+    def test_drop_policy(self):
+        writer = BufferedWriter(self.connection, max_batch_size=100, flush_interval=60, max_buffer_size=5,
+                                overflow_policy=OverflowPolicy.DROP)
+        accepted = [writer.insert(Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME)) for _ in range(8)]
+        writer.flush()
+        self.assertEqual([True] * 5 + [False] * 3, accepted)
+        self.assertEqual(3, writer.dropped)
+        self.assertEqual(5, writer.sent)
+        writer.close()
+        with self.assertRaises(ValueError):
+            writer.insert(Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME))
+
+    def test_errors_do_not_stop_writer(self):
+        class Unserializable(object):
+            def to_dict(self):
+                raise ValueError('could not be serialized')
+
+        failed = []
+
+        def on_error(exception, records):
+            failed.append((exception, records))
+            raise RuntimeError('on_error failed')
+
+        writer = BufferedWriter(self.connection, max_batch_size=1, flush_interval=60, on_error=on_error)
+        with self.assertRaises(atsd_client.exceptions.DataParseException):
+            writer.insert(Series(ENTITY, METRIC), Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME))
+        bad = Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME, tags={'bad': Unserializable()})
+        writer.insert(bad, Message('pyapi.type', 'pyapi.source', ENTITY, date=TIME, message='ok'))
+        writer.flush()
+        self.assertEqual(1, len(failed))
+        self.assertIsInstance(failed[0][0], ValueError)
+        self.assertEqual([bad], failed[0][1])
+        self.assertTrue(writer._thread.is_alive())
+        writer.insert(Series(ENTITY, METRIC, data=[Sample(1, TIME)]))
+        writer.close()
+        self.assertEqual(2, writer.sent)
+        self.assertEqual(1, writer.errors)
+        paths = [path for method, path, headers, body in self.server.requests]
+        self.assertEqual(['/api/v1/messages/insert', '/api/v1/series/insert'], paths)